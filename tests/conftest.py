@@ -1,6 +1,8 @@
 import sys
 import os
 
+import pytest
+
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
@@ -32,3 +34,10 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def build_thumbnails_inline(settings):
+    # Фоновый поток мог бы писать миниатюру во временный MEDIA_ROOT,
+    # когда фикстура его уже удаляет
+    settings.THUMBNAIL_WORKERS = 0
@@ -1,20 +1,60 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from .models import Comment, Follow, Group, Post
+from .paginators import EstimatedCountPaginator
+from .search import filter_posts
 
 
-class PostAdmin(admin.ModelAdmin):
+class ScalableAdmin(admin.ModelAdmin):
+    """Общие настройки списков для больших таблиц.
+
+    Вместо точного COUNT(*) — оценка числа строк, без счетчика «всего»,
+    а связанные объекты загружаются тем же запросом, что и строки.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = "-пусто-"
+
+
+class PostAdmin(ScalableAdmin):
     list_display = ("pk", "text", "pub_date", "group", "author")
+    list_select_related = ("author", "group")
     search_fields = ("text", )
     list_filter = ("pub_date", )
-    empty_value_display = "-пусто-"
+    raw_id_fields = ("author", )
+    autocomplete_fields = ("group", )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по полнотекстовому индексу вместо LIKE '%...%' по таблице.
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(ScalableAdmin):
     list_display = ("pk", "title", "slug", "description", )
     search_fields = ("title", "description")
-    empty_value_display = "-пусто-"
+
+
+class CommentAdmin(ScalableAdmin):
+    list_display = ("pk", "text", "created", "post", "author")
+    list_select_related = ("post", "author")
+    # Точное совпадение имени идет по уникальному индексу.
+    search_fields = ("=author__username", )
+    raw_id_fields = ("post", "author")
+    # У created нет индекса, а порядок id совпадает с порядком создания.
+    ordering = ("-pk", )
+
+
+class FollowAdmin(ScalableAdmin):
+    list_display = ("pk", "user", "author")
+    list_select_related = ("user", "author")
+    search_fields = ("=user__username", "=author__username")
+    raw_id_fields = ("user", "author")
+    ordering = ("-pk", )
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,245 @@
+"""Кэш лент с версионными ключами.
+
+У каждой ленты есть версия — метка времени последнего изменения состава
+ленты. Она входит в ключ закэшированных страниц, поэтому записи кэша
+могут жить часами: новая, удаленная или перенесенная запись меняет
+версию, и старые ключи больше не читаются. Версии меняются обработчиками
+сигналов Post, Follow и Group.
+
+Страница хранится компактно: id записей и курсоры соседних страниц.
+Сами записи лежат в кэше по одной и загружаются пачкой, поэтому правка
+записи или новый комментарий сбрасывают только ее собственный ключ.
+
+Страницу пересобирает один запрос (get_or_build): остальные в это время
+получают прежнюю версию страницы, а горячие ключи обновляются чуть раньше
+истечения, чтобы не истекать у всех одновременно. Пересборка читает
+основную базу, а не реплики.
+"""
+import hashlib
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from yatube.db.routers import use_primary
+
+from .models import Follow, Post
+from .paginators import AFTER_PARAM, BEFORE_PARAM, PAGE_PARAM
+from .timeline import is_pulled
+
+# Общая версия всех лент: меняется, когда правка затрагивает карточки
+# записей во всех лентах сразу (например, название группы).
+ALL_FEEDS = "all"
+INDEX_FEED = "index"
+# Версия карточек: меняется при правке записи или новом комментарии.
+# Кэш страниц от нее не зависит, только валидаторы HTTP-кэша.
+POST_CARDS = "cards"
+
+
+def group_feed(group_id):
+    return f"group-{group_id}"
+
+
+def profile_feed(author_id):
+    return f"profile-{author_id}"
+
+
+def follow_feed(user_id):
+    return f"follow-{user_id}"
+
+
+def post_page(post_id):
+    return f"post-{post_id}"
+
+
+def stats_feed(user_id):
+    return f"stats-{user_id}"
+
+
+def digest(parts):
+    return hashlib.md5("-".join(parts).encode()).hexdigest()
+
+
+def _version_key(feed):
+    return f"feed-version-{feed}"
+
+
+def _new_version():
+    return f"{time.time():.6f}"
+
+
+def get_versions(feeds):
+    """Версии лент; ленте без версии она заводится."""
+    keys = [_version_key(feed) for feed in (ALL_FEEDS, *feeds)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = _new_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def bump(*feeds):
+    """Помечает ленты измененными."""
+    version = _new_version()
+    cache.set_many(
+        {_version_key(feed): version for feed in feeds}, None
+    )
+
+
+def bump_post_feeds(author_id, group_ids=()):
+    """Сбрасывает ленты, в которых показывается запись."""
+    feeds = [INDEX_FEED, profile_feed(author_id)]
+    feeds.extend(group_feed(group_id) for group_id in group_ids if group_id)
+    # Ленты подписчиков популярных авторов зависят от версии их профиля,
+    # поэтому перебирать подписчиков нужно только у остальных.
+    if not is_pulled(author_id):
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list("user_id", flat=True)
+        feeds.extend(follow_feed(user_id) for user_id in followers)
+    bump(*feeds)
+
+
+def _post_key(post_id, version):
+    return f"post-{post_id}-{version}"
+
+
+def forget_post(post_id):
+    """Сбрасывает закэшированную запись после правки или комментария."""
+    all_version = get_versions([])[0]
+    cache.delete(_post_key(post_id, all_version))
+    bump(POST_CARDS, post_page(post_id))
+
+
+def cache_posts(posts, all_version):
+    cache.set_many(
+        {_post_key(post.pk, all_version): post for post in posts},
+        settings.POST_CACHE_TIMEOUT,
+    )
+
+
+def load_posts(ids, all_version):
+    """Записи в порядке ids: из кэша, недостающие — одним запросом."""
+    keys = {_post_key(post_id, all_version): post_id for post_id in ids}
+    cached = cache.get_many(keys)
+    posts = {post.pk: post for post in cached.values()}
+    missing = [post_id for post_id in ids if post_id not in posts]
+    if missing:
+        with use_primary():
+            loaded = Post.objects.for_feed().in_bulk(missing)
+        cache_posts(loaded.values(), all_version)
+        posts.update(loaded)
+    return [posts[post_id] for post_id in ids if post_id in posts]
+
+
+def _needs_refresh(entry):
+    """Вероятностное раннее обновление (XFetch).
+
+    Чем ближе истечение и чем дольше пересборка, тем вероятнее, что
+    запрос обновит значение заранее, — запросы не упираются в момент
+    истечения все разом.
+    """
+    jitter = -entry["delta"] * settings.CACHE_EARLY_REFRESH_BETA * math.log(
+        1 - random.random()
+    )
+    return time.time() + jitter >= entry["expires"]
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_build(key, build, timeout, stale_key=None):
+    """Значение из кэша с защитой от одновременной пересборки.
+
+    Пересобирает значение только тот, кто взял блокировку; остальные в
+    это время получают устаревшее значение (из key или stale_key), а если
+    его нет — ждут результата. stale_key переживает смену версии ключа.
+    """
+    entry = cache.get(key)
+    if entry is not None and not _needs_refresh(entry):
+        return entry["value"]
+    if entry is None and stale_key is not None:
+        entry = cache.get(stale_key)
+
+    lock_key = f"{key}-lock"
+    locked = cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            return entry["value"]
+        entry = _wait_for(key)
+        if entry is not None:
+            return entry["value"]
+        # Не дождались: собираем сами, чтобы не отдавать ошибку.
+
+    try:
+        started = time.monotonic()
+        # В кэш попадают только данные основной базы: отставшая реплика
+        # сохранила бы старое значение под новой версией ключа.
+        with use_primary():
+            value = build()
+        entry = {
+            "value": value,
+            "expires": time.time() + timeout,
+            "delta": time.monotonic() - started,
+        }
+        cache.set(key, entry, timeout)
+        if stale_key is not None:
+            cache.set(stale_key, entry, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def get_feed_page(request, paginator, feeds):
+    """Страница ленты: id из кэша, записи из кэша записей.
+
+    page.stale — страница собрана по прежним версиям лент.
+    """
+    versions = get_versions(feeds)
+    all_version = versions[0]
+    params = "{}-{}-{}".format(
+        request.GET.get(PAGE_PARAM),
+        request.GET.get(AFTER_PARAM),
+        request.GET.get(BEFORE_PARAM),
+    )
+    versions_digest = digest(versions)
+    key = f"feed-page-{feeds[0]}-{versions_digest}-{params}"
+    paginator.query_params = request.GET
+    built = {}
+
+    def build():
+        built["page"] = paginator.get_request_page(request)
+        cache_posts(built["page"].object_list, all_version)
+        return dict(
+            paginator.page_state(built["page"]), versions=versions_digest
+        )
+
+    state = get_or_build(
+        key,
+        build,
+        settings.FEED_CACHE_TIMEOUT,
+        stale_key=f"feed-page-{feeds[0]}-stale-{params}",
+    )
+    if "page" in built:
+        page = built["page"]
+    else:
+        page = paginator.restore_page(
+            state, load_posts(state["ids"], all_version)
+        )
+    # Пока страницу пересобирает другой запрос, отдается страница из
+    # stale_key, собранная по прежним версиям лент.
+    page.stale = state.get("versions") != versions_digest
+    return page
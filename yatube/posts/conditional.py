@@ -0,0 +1,62 @@
+"""Условные GET-запросы (ETag / Last-Modified) для лент и записей.
+
+Валидаторы строятся из версий лент в кэше — без запросов к базе и без
+рендеринга. Версия — метка времени последнего изменения, поэтому она же
+служит Last-Modified. В ETag входит и пользователь: страницы выглядят
+по-разному для гостя, автора и подписчика.
+
+Last-Modified точен до секунды, поэтому отдается, только когда секунда
+последнего изменения уже прошла: изменение в ту же секунду не сдвинуло
+бы дату, и клиент с одним If-Modified-Since получал бы 304 на старую
+страницу. До тех пор страница проверяется только по ETag.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.shortcuts import render as render_page
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import caching
+
+
+def get_validators(request, feeds):
+    """ETag и Last-Modified страницы, собранной из лент feeds.
+
+    Last-Modified — None, пока не прошла секунда последнего изменения.
+    """
+    versions = caching.get_versions(feeds)
+    etag = caching.digest([str(request.user.pk), *versions])
+    modified = int(max(float(version) for version in versions))
+    last_modified = None
+    if modified < int(time.time()):
+        last_modified = datetime.fromtimestamp(modified, timezone.utc)
+    return quote_etag(etag), last_modified
+
+
+def not_modified(request, validators):
+    """Ответ 304, если у клиента актуальная копия страницы."""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    etag, last_modified = validators
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+
+def render(request, template_name, context, validators):
+    """Рендерит страницу и проставляет валидаторы.
+
+    Устаревшая страница ленты (page.stale) уходит без них: с валидаторами
+    текущих версий клиент получал бы на нее 304 до следующей записи.
+    """
+    response = render_page(request, template_name, context)
+    if getattr(context.get("page"), "stale", False):
+        return response
+    etag, last_modified = validators
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm, Textarea
+from PIL import Image
 
+from . import images
 from .models import Post, Comment
 
 
@@ -18,6 +23,28 @@ class PostForm(ModelForm):
             "text": Textarea(attrs={"rows": 10, "style": "width:100%"})
         }
 
+    def clean_image(self):
+        """Загруженная картинка сохраняется уже нормализованной."""
+        image = self.cleaned_data.get("image")
+        if image is False:
+            self.set_image_info(images.EMPTY_INFO)
+            self.instance.original_image = None
+        if not isinstance(image, UploadedFile):
+            return image
+        try:
+            normalized = images.normalize(image)
+            self.set_image_info(images.describe(normalized))
+        except (OSError, Image.DecompressionBombError):
+            raise ValidationError("Не удалось обработать изображение.")
+        keep = settings.IMAGE_KEEP_ORIGINAL and normalized is not image
+        # Исходник относится только к текущей картинке записи.
+        self.instance.original_image = image if keep else None
+        return normalized
+
+    def set_image_info(self, info):
+        for field, value in info.items():
+            setattr(self.instance, field, value)
+
 
 class CommentForm(ModelForm):
     class Meta:
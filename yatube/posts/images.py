@@ -0,0 +1,109 @@
+"""Нормализация загруженных картинок и сведения о них.
+
+Картинка уменьшается до settings.IMAGE_MAX_SIZE, теряет метаданные
+(EXIF, ICC, XMP, комментарии) и перекодируется в settings.IMAGE_FORMAT
+с качеством settings.IMAGE_QUALITY. Исходные байты остаются, только если
+картинка и так укладывается в ограничения, метаданных в ней нет, а
+перекодирование не уменьшило бы файл. Анимации не перекодируются.
+
+Размеры и заглушка (describe) вычисляются один раз при загрузке, чтобы
+шаблоны не открывали файл картинки.
+"""
+import base64
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+METADATA_KEYS = ("exif", "icc_profile", "xmp", "comment", "photoshop")
+
+# Заглушка — крошечное размытое превью, встроенное в страницу data URI.
+PLACEHOLDER_SIZE = (16, 16)
+
+# Сведения о картинке записи без картинки.
+EMPTY_INFO = {
+    "image_width": None,
+    "image_height": None,
+    "image_placeholder": "",
+}
+
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+
+def has_metadata(image):
+    return any(image.info.get(key) for key in METADATA_KEYS)
+
+
+def encode(image):
+    """Байты картинки в формате IMAGE_FORMAT, без метаданных."""
+    image_format = settings.IMAGE_FORMAT
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    if has_alpha and image_format != "JPEG":
+        image = image.convert("RGBA")
+    else:
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(
+        output,
+        image_format,
+        quality=settings.IMAGE_QUALITY,
+        optimize=True,
+    )
+    return output.getvalue()
+
+
+def normalize(upload):
+    """Нормализованная картинка для сохранения вместо upload.
+
+    Возвращает upload без изменений или ContentFile с новым именем.
+    """
+    upload.seek(0)
+    source = upload.read()
+    upload.seek(0)
+    image = Image.open(io.BytesIO(source))
+    if getattr(image, "n_frames", 1) > 1:
+        return upload
+
+    max_size = settings.IMAGE_MAX_SIZE
+    fits = image.width <= max_size[0] and image.height <= max_size[1]
+    clean = not has_metadata(image)
+    # JPEG можно декодировать сразу в уменьшенном масштабе: это в разы
+    # быстрее полного декодирования больших фотографий.
+    image.draft("RGB", max_size)
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(max_size, Image.LANCZOS)
+    data = encode(image)
+    if fits and clean and len(data) >= len(source):
+        return upload
+
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    extension = EXTENSIONS.get(settings.IMAGE_FORMAT, "img")
+    return ContentFile(data, name=f"{name}.{extension}")
+
+
+def placeholder(image):
+    """Data URI размытого превью картинки размером в пару сотен байт."""
+    image = image.copy()
+    image.draft("RGB", PLACEHOLDER_SIZE)
+    image.thumbnail(PLACEHOLDER_SIZE)
+    output = io.BytesIO()
+    image.convert("RGB").save(output, "WEBP", quality=30)
+    data = base64.b64encode(output.getvalue()).decode()
+    return f"data:image/webp;base64,{data}"
+
+
+def describe(file):
+    """Ширина, высота и заглушка картинки для сохранения в записи."""
+    file.seek(0)
+    image = Image.open(file)
+    width, height = image.size
+    preview = placeholder(image)
+    file.seek(0)
+    return {
+        "image_width": width,
+        "image_height": height,
+        "image_placeholder": preview,
+    }
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from PIL import Image
+
+from posts import caching, images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Заполняет размеры и заглушки картинок у старых записей."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Начать с записей, id которых больше этого (продолжение).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько записей обновлять за один запрос.",
+        )
+
+    def handle(self, *args, **options):
+        after_id, chunk_size = options["after_id"], options["chunk_size"]
+        fields = [*images.EMPTY_INFO, "updated"]
+        updated = failed = 0
+        while True:
+            chunk = list(
+                Post.objects.filter(pk__gt=after_id, image_width__isnull=True)
+                .exclude(image="").exclude(image__isnull=True)
+                .order_by("pk").only("pk", "image")[:chunk_size]
+            )
+            if not chunk:
+                break
+            after_id = chunk[-1].pk
+
+            described = []
+            for post in chunk:
+                try:
+                    with post.image.open("rb") as file:
+                        info = images.describe(file)
+                except (OSError, Image.DecompressionBombError) as error:
+                    failed += 1
+                    self.stderr.write(f"Запись {post.pk}: {error}")
+                    continue
+                for field, value in info.items():
+                    setattr(post, field, value)
+                # Карточки кэшируются по дате изменения.
+                post.updated = timezone.now()
+                described.append(post)
+            Post.objects.bulk_update(described, fields)
+            for post in described:
+                caching.forget_post(post.pk)
+            updated += len(described)
+            self.stdout.write(
+                f"Обновлено записей: {updated}, последняя: {after_id}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: обновлено {updated}, с ошибками {failed}."
+        ))
@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import build_quietly
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит миниатюры всех картинок записей в пуле процессов. "
+        "Уже построенные миниатюры только регистрируются в хранилище sorl."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Начать с записей, id которых больше этого (продолжение).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Сколько записей читать из базы за один запрос.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов (0 — без пула); по умолчанию — число ядер.",
+        )
+
+    def chunks(self, after_id, chunk_size):
+        while True:
+            chunk = list(
+                Post.objects.filter(pk__gt=after_id).exclude(image="")
+                .exclude(image__isnull=True).order_by("pk")
+                .values_list("pk", "image")[:chunk_size]
+            )
+            if not chunk:
+                return
+            after_id = chunk[-1][0]
+            yield chunk
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 0)
+        chunks = self.chunks(options["after_id"], options["chunk_size"])
+        started = time.monotonic()
+        posts = thumbnails = 0
+        failures = []
+
+        with ExitStack() as stack:
+            run = map
+            if workers:
+                executor = stack.enter_context(
+                    ProcessPoolExecutor(max_workers=workers)
+                )
+                run = partial(executor.map, chunksize=16)
+            for chunk in chunks:
+                if workers:
+                    # Процессы пула не должны наследовать соединения с базой.
+                    connections.close_all()
+                for post_id, built, error in run(build_quietly, chunk):
+                    posts += 1
+                    thumbnails += built
+                    if error is not None:
+                        failures.append((post_id, error))
+                self.stdout.write(
+                    f"Обработано записей: {posts}, последняя: {chunk[-1][0]}"
+                )
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Записей: {posts}, миниатюр: {thumbnails}, "
+            f"процессов: {workers}, время: {elapsed:.1f} с, "
+            f"{posts / elapsed:.1f} записей/с, "
+            f"{thumbnails / elapsed:.1f} миниатюр/с"
+        )
+        for post_id, error in failures:
+            self.stderr.write(f"Запись {post_id}: {error}")
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f"Не удалось построить миниатюры для {len(failures)} записей."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("Миниатюры готовы."))
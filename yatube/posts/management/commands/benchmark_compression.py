@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import reverse
+from django.test import Client
+
+from posts.models import Group, Post
+from yatube.middleware import compress
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает выигрыш в байтах от сжатия страниц с затратами "
+        "процессора на сжатие."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--level",
+            type=int,
+            action="append",
+            dest="levels",
+            help="Уровень сжатия; можно указать несколько раз.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Сколько раз запрашивать и сжимать каждую страницу.",
+        )
+
+    def measure(self, func, repeat):
+        """Лучшее процессорное время func в миллисекундах."""
+        best = None
+        for _ in range(repeat):
+            started = time.process_time()
+            func()
+            elapsed = (time.process_time() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def get_urls(self):
+        post = Post.objects.select_related("author").order_by("-pk").first()
+        if post is None:
+            raise CommandError("Нет записей: страницы будут пустыми.")
+        urls = {
+            "index": reverse("index"),
+            "profile": reverse("profile", args=[post.author.username]),
+            "post": reverse(
+                "post", args=[post.author.username, post.pk]
+            ),
+        }
+        group = Group.objects.order_by("pk").first()
+        if group is not None:
+            urls["group_posts"] = reverse("group_posts", args=[group.slug])
+        return urls
+
+    def handle(self, *args, **options):
+        levels = options["levels"] or [1, 6, 9]
+        repeat = options["repeat"]
+        client = Client()
+
+        header = f"{'страница':<12} {'байт':>8} {'вид, мс':>8}"
+        for level in levels:
+            header += f" {f'gzip-{level}':>8} {'%':>4} {'мс':>6}"
+        self.stdout.write(header)
+
+        for name, url in self.get_urls().items():
+            # Без Accept-Encoding страница приходит несжатой.
+            content = client.get(url).content
+            view = self.measure(lambda: client.get(url), repeat)
+            line = f"{name:<12} {len(content):>8} {view:>8.2f}"
+            for level in levels:
+                size = len(compress(content, level))
+                cost = self.measure(lambda: compress(content, level), repeat)
+                line += (
+                    f" {size:>8} {100 * size // len(content):>4}"
+                    f" {cost:>6.2f}"
+                )
+            self.stdout.write(line)
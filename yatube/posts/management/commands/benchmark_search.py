@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import SearchResults
+
+
+class Command(BaseCommand):
+    help = "Сравнивает поиск по индексу FTS5 с поиском через icontains."
+
+    def add_arguments(self, parser):
+        parser.add_argument("terms", nargs="+", help="Поисковые запросы.")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Сколько раз выполнять каждый запрос.",
+        )
+        parser.add_argument(
+            "--per-page",
+            type=int,
+            default=10,
+            help="Размер страницы результатов.",
+        )
+
+    def measure(self, func, repeat):
+        """Лучшее время выполнения func в миллисекундах."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        repeat, per_page = options["repeat"], options["per_page"]
+        self.stdout.write(
+            f"{'запрос':<20} {'найдено':>8} {'fts5, мс':>10} "
+            f"{'icontains, мс':>14}"
+        )
+        for term in options["terms"]:
+            results = SearchResults(term, Post.objects.all())
+            found = results.count()
+            fts = self.measure(
+                lambda: (results.count(), results[0:per_page]), repeat
+            )
+
+            def icontains():
+                posts = Post.objects.filter(text__icontains=term)
+                return posts.count(), list(
+                    posts.order_by("-pub_date", "-id")[:per_page]
+                )
+
+            like = self.measure(icontains, repeat)
+            self.stdout.write(
+                f"{term:<20} {found:>8} {fts:>10.2f} {like:>14.2f}"
+            )
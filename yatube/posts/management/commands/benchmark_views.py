@@ -0,0 +1,302 @@
+import json
+import math
+import os
+import platform
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.shortcuts import reverse
+from django.template.backends.django import Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from posts.models import AuthorStats, Group, Post
+
+VIEWS = (
+    "index", "group_posts", "profile", "post_view", "follow_index",
+    "new_post", "add_comment",
+)
+# Метрики, рост которых считается регрессией.
+COMPARED = ("p95", "queries")
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, queries, renders):
+    return {
+        "requests": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": sum(latencies) / len(latencies),
+        "queries": sum(queries) / len(queries),
+        "render_p50": percentile(renders, 50),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Регрессии: метрики, выросшие относительно базы больше threshold."""
+    regressions = []
+    for size, views in results.items():
+        for view, metrics in views.items():
+            base = baseline.get(size, {}).get(view)
+            if not base:
+                continue
+            for metric in COMPARED:
+                if base[metric] and (
+                    metrics[metric] > base[metric] * (1 + threshold)
+                ):
+                    regressions.append({
+                        "size": size,
+                        "view": view,
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": metrics[metric],
+                    })
+    return regressions
+
+
+@contextmanager
+def rolled_back():
+    """Все изменения базы внутри блока откатываются."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def temporary_database(path):
+    """Основная база на время блока подменяется файлом path."""
+    settings_dict = connection.settings_dict
+    name = settings_dict["NAME"]
+    connection.close()
+    settings_dict["NAME"] = path
+    try:
+        yield
+    finally:
+        connection.close()
+        settings_dict["NAME"] = name
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет представления внутри процесса: задержки p50/p95/p99, "
+        "число запросов SQL и время отрисовки шаблона. С --sizes "
+        "замеры идут на временных базах, заполненных seed_data; без "
+        "него — на текущей базе. Запросы new_post и add_comment "
+        "выполняются в транзакции, которая откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            help="Размеры наборов данных в записях.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Сколько замеренных запросов к каждому представлению.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="Сколько запросов сделать до замеров.",
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Не очищать кэш перед запросами (по умолчанию очищается).",
+        )
+        parser.add_argument(
+            "--views",
+            nargs="+",
+            choices=VIEWS,
+            default=VIEWS,
+        )
+        parser.add_argument(
+            "--output",
+            help="Файл для отчета в JSON.",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="Отчет в JSON, с которым сравнить результаты.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Допустимый рост p95 и числа запросов (0.2 — на 20%%).",
+        )
+
+    def requests(self):
+        """Запросы к представлениям: имя -> (метод, адрес, данные)."""
+        stats = AuthorStats.objects.order_by
+        reader = stats("-following_count").first()
+        author = stats("-followers_count").first()
+        post = Post.objects.select_related("author").order_by(
+            "-comment_count"
+        ).first()
+        group = Group.objects.order_by("pk").first()
+        if not (reader and author and post and group):
+            raise CommandError(
+                "В базе нет данных для замеров: запустите seed_data."
+            )
+        self.reader = reader.user
+        post_args = [post.author.username, post.pk]
+        return {
+            "index": ("get", reverse("index"), None),
+            "group_posts": (
+                "get", reverse("group_posts", args=[group.slug]), None
+            ),
+            "profile": (
+                "get", reverse("profile", args=[author.user.username]), None
+            ),
+            "post_view": ("get", reverse("post", args=post_args), None),
+            "follow_index": ("get", reverse("follow_index"), None),
+            "new_post": (
+                "post", reverse("new_post"), {"text": "Замер new_post"}
+            ),
+            "add_comment": (
+                "post",
+                reverse("add_comment", args=post_args),
+                {"text": "Замер add_comment"},
+            ),
+        }
+
+    def measure(self, client, method, url, data, options):
+        latencies, queries, renders = [], [], []
+        rendered = []
+        original_render = Template.render
+
+        def timed_render(template, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original_render(template, *args, **kwargs)
+            finally:
+                rendered.append((time.perf_counter() - started) * 1000)
+
+        send = getattr(client, method)
+        with mock.patch.object(Template, "render", timed_render):
+            for number in range(options["warmup"] + options["repeat"]):
+                if not options["warm_cache"]:
+                    cache.clear()
+                rendered.clear()
+                # Записи откатываются: замеры не оставляют данных в базе, и
+                # набор данных не растет от повтора к повтору.
+                writes = rolled_back() if method == "post" else nullcontext()
+                with writes, CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = send(url, data)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code not in (200, 302):
+                    raise CommandError(
+                        f"{url}: ответ {response.status_code}."
+                    )
+                if number < options["warmup"]:
+                    continue
+                latencies.append(elapsed)
+                queries.append(len(captured))
+                renders.append(sum(rendered))
+        return summarize(latencies, queries, renders)
+
+    def run_views(self, options):
+        requests = self.requests()
+        client = Client()
+        client.force_login(self.reader)
+        results = {}
+        for view in options["views"]:
+            method, url, data = requests[view]
+            results[view] = self.measure(client, method, url, data, options)
+            self.write_line(view, results[view])
+        return results
+
+    def write_line(self, view, metrics):
+        self.stdout.write(
+            f"{view:<14} {metrics['p50']:>8.2f} {metrics['p95']:>8.2f} "
+            f"{metrics['p99']:>8.2f} {metrics['queries']:>8.1f} "
+            f"{metrics['render_p50']:>8.2f}"
+        )
+
+    @contextmanager
+    def seeded(self, size, seed):
+        """Временная база с size записями."""
+        directory = tempfile.mkdtemp()
+        try:
+            with temporary_database(os.path.join(directory, "db.sqlite3")):
+                call_command("migrate", verbosity=0)
+                call_command(
+                    "seed_data",
+                    posts=size,
+                    users=max(size // 10, 10),
+                    groups=min(max(size // 1000, 1), 100),
+                    follows=size,
+                    comments=size * 2,
+                    seed=seed,
+                    stdout=StringIO(),
+                )
+                cache.clear()
+                yield
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def handle(self, *args, **options):
+        header = (
+            f"{'представление':<14} {'p50, мс':>8} {'p95, мс':>8} "
+            f"{'p99, мс':>8} {'запросы':>8} {'шаблон':>8}"
+        )
+        results = {}
+        for size in options["sizes"] or [None]:
+            label = str(size) if size else "current"
+            self.stdout.write(f"Набор данных: {label}")
+            self.stdout.write(header)
+            if size:
+                with self.seeded(size, options["seed"]):
+                    results[label] = self.run_views(options)
+            else:
+                results[label] = self.run_views(options)
+
+        report = {
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "options": {
+                name: options[name]
+                for name in ("repeat", "warmup", "warm_cache", "seed")
+            },
+            "results": results,
+        }
+        regressions = []
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)["results"]
+            regressions = compare(results, baseline, options["threshold"])
+            report["regressions"] = regressions
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        for item in regressions:
+            self.stderr.write(
+                "{size} {view}: {metric} {baseline:.2f} -> "
+                "{current:.2f}".format(**item)
+            )
+        if regressions:
+            raise CommandError(f"Регрессий: {len(regressions)}.")
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Обслуживание SQLite: обновляет статистику планировщика и "
+        "сбрасывает журнал WAL в базу. Запускается по расписанию, "
+        "например раз в сутки из cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Полный ANALYZE вместо выборочного PRAGMA optimize.",
+        )
+
+    def run(self, cursor, sql):
+        started = time.perf_counter()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"{sql}: {elapsed:.0f} мс")
+        return rows
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stdout.write("Команда нужна только для SQLite.")
+            return
+        with connection.cursor() as cursor:
+            if options["analyze"]:
+                self.run(cursor, "ANALYZE")
+            else:
+                # Ограничение выборки держит optimize в пределах секунд
+                # даже на больших таблицах.
+                cursor.execute("PRAGMA analysis_limit = 1000")
+                self.run(cursor, "PRAGMA optimize")
+            if connection.is_in_memory_db():
+                return
+            busy, log, checkpointed = self.run(
+                cursor, "PRAGMA wal_checkpoint(TRUNCATE)"
+            )[0]
+        if log == -1:
+            self.stdout.write("База не в режиме WAL.")
+        elif busy:
+            self.stderr.write(
+                "Журнал WAL сброшен не полностью: база занята."
+            )
+        else:
+            self.stdout.write(f"Страниц из журнала: {checkpointed}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сохраненное число комментариев у записей."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Сколько записей пересчитывать за один UPDATE.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = Post.objects.aggregate(last_id=Max("pk"))["last_id"] or 0
+        updated = 0
+        # Диапазоны по первичному ключу: каждый UPDATE короткий и не держит
+        # блокировку всей таблицы на время пересчета.
+        for start in range(0, last_id, chunk_size):
+            updated += Post.objects.filter(
+                pk__gt=start, pk__lte=start + chunk_size
+            ).recount_comments()
+            self.stdout.write(f"Пересчитано записей: {updated}")
+
+        self.stdout.write(self.style.SUCCESS("Счетчики комментариев готовы."))
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import AuthorStats, Follow
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет материализованные ленты по существующим подпискам. "
+        "Авторам, которые снова опустились под порог, записи раскладываются "
+        "по лентам, и при чтении они больше не подмешиваются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Сколько подписок обрабатывать за один проход.",
+        )
+        parser.add_argument(
+            "--pulled",
+            action="store_true",
+            help="Только подписки на авторов, которые снова под порогом.",
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options["chunk_size"]
+        self.total = 0
+        limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        caught_up = list(AuthorStats.objects.filter(
+            pulled=True, followers_count__lte=limit
+        ).values_list("user_id", flat=True))
+
+        if options["pulled"]:
+            for author_id in caught_up:
+                self.backfill(Follow.objects.filter(author_id=author_id))
+        else:
+            self.backfill(Follow.objects.all())
+        # Автор, снова перешедший порог во время прохода, остается pulled.
+        AuthorStats.objects.filter(
+            user_id__in=caught_up, followers_count__lte=limit
+        ).update(pulled=False)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ленты подписок заполнены, авторов вернулось в ленты: "
+            f"{len(caught_up)}."
+        ))
+
+    def backfill(self, follows):
+        last_id = 0
+        while True:
+            chunk = list(
+                follows.filter(pk__gt=last_id).order_by(
+                    "pk"
+                ).values_list("pk", "user_id", "author_id")[:self.chunk_size]
+            )
+            if not chunk:
+                return
+            for last_id, user_id, author_id in chunk:
+                timeline.backfill(user_id, author_id)
+            self.total += len(chunk)
+            self.stdout.write(f"Обработано подписок: {self.total}")
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from posts.models import AuthorStats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Сверяет статистику авторов с исходными таблицами."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько пользователей сверять за один проход.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = User.objects.aggregate(last_id=Max("pk"))["last_id"] or 0
+        reconciled = 0
+        for start in range(0, last_id, batch_size):
+            user_ids = User.objects.filter(
+                pk__gt=start, pk__lte=start + batch_size
+            ).values_list("pk", flat=True)
+            AuthorStats.objects.bulk_create(
+                [AuthorStats(user_id=user_id) for user_id in user_ids],
+                ignore_conflicts=True,
+            )
+            reconciled += AuthorStats.objects.filter(
+                pk__gt=start, pk__lte=start + batch_size
+            ).recount()
+            self.stdout.write(f"Сверено пользователей: {reconciled}")
+
+        self.stdout.write(self.style.SUCCESS("Статистика авторов сверена."))
@@ -0,0 +1,340 @@
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts import caching, search
+from posts.models import (
+    AuthorStats, Comment, Follow, Group, Post, TimelineEntry
+)
+
+User = get_user_model()
+
+WORDS = (
+    "день город дом работа жизнь друг мир время утро вечер книга море "
+    "дорога солнце дождь кофе музыка фильм идея проект код отпуск лето "
+    "зима весна осень кот собака поезд самолет горы лес река новость "
+    "вопрос ответ история фото прогулка ужин завтрак семья школа встреча "
+    "сегодня вчера завтра снова наконец очень просто новый старый хороший "
+    "интересный странный долгий короткий тихий громкий теплый холодный"
+).split()
+
+
+def power_law_weights(count, exponent):
+    """Накопленные веса закона Ципфа: k-й по рангу весит 1 / k ** exponent."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def batched(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу большим объемом правдоподобных данных для замеров: "
+        "пользователи, группы, записи, подписки и комментарии. Число "
+        "подписчиков автора, записей автора и комментариев к записи "
+        "распределены по степенному закону; одинаковый --seed дает "
+        "одинаковые данные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=1000000)
+        parser.add_argument("--follows", type=int, default=1000000)
+        parser.add_argument("--comments", type=int, default=2000000)
+        parser.add_argument(
+            "--followers-exponent",
+            type=float,
+            default=1.2,
+            help="Показатель степени для числа подписчиков автора.",
+        )
+        parser.add_argument(
+            "--posts-exponent",
+            type=float,
+            default=1.0,
+            help="Показатель степени для числа записей автора.",
+        )
+        parser.add_argument(
+            "--comments-exponent",
+            type=float,
+            default=1.1,
+            help="Показатель степени для числа комментариев к записи.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="За сколько последних дней распределить записи.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Сколько строк вставлять одним executemany.",
+        )
+        parser.add_argument(
+            "--skip-timelines",
+            action="store_true",
+            help="Не заполнять материализованные ленты подписок.",
+        )
+
+    def insert(self, label, model, fields, rows):
+        """Вставляет строки пачками в обход ORM и сигналов."""
+        quote = connection.ops.quote_name
+        columns = ", ".join(
+            quote(model._meta.get_field(name).column) for name in fields
+        )
+        placeholders = ", ".join(["%s"] * len(fields))
+        sql = (
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES ({placeholders})"
+        )
+        total = 0
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            total += len(batch)
+        self.report(label, total)
+        return total
+
+    def report(self, label, total):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f"{label}: {total} ({elapsed:.1f} с)")
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+    def date(self, value):
+        return connection.ops.adapt_datetimefield_value(value)
+
+    def ranked(self, ids, exponent, count):
+        """count случайных id с весами по рангу.
+
+        Ранги достаются id случайно, но повторяемо: самый читаемый автор
+        не обязательно самый плодовитый.
+        """
+        ids = list(ids)
+        self.rng.shuffle(ids)
+        weights = power_law_weights(len(ids), exponent)
+        return self.rng.choices(ids, cum_weights=weights, k=count)
+
+    def handle(self, *args, **options):
+        for name in ("users", "posts", "groups"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} должно быть больше нуля.")
+        self.batch_size = options["batch_size"]
+        self.started = time.monotonic()
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options["days"])
+
+        first_user = self.next_id(User)
+        user_ids = range(first_user, first_user + options["users"])
+        first_group = self.next_id(Group)
+        group_ids = range(first_group, first_group + options["groups"])
+        first_post = self.next_id(Post)
+        post_ids = range(first_post, first_post + options["posts"])
+
+        authors = self.ranked(
+            user_ids, options["posts_exponent"], len(post_ids)
+        )
+        commented = self.ranked(
+            post_ids, options["comments_exponent"], options["comments"]
+        )
+        followed = self.ranked(
+            user_ids, options["followers_exponent"], options["follows"]
+        )
+        followers = self.rng.choices(user_ids, k=len(followed))
+        follows = sorted({
+            (follower, author)
+            for follower, author in zip(followers, followed)
+            if follower != author
+        })
+
+        search_enabled = search.fts_enabled()
+        if search_enabled:
+            # Поисковый индекс перестраивается одним проходом в конце:
+            # это в разы быстрее триггера на каждую вставку.
+            with connection.cursor() as cursor:
+                cursor.execute("DROP TRIGGER IF EXISTS posts_post_fts_insert")
+
+        try:
+            self.insert_users(user_ids)
+            self.insert_groups(group_ids)
+            post_dates = self.insert_posts(
+                post_ids, authors, group_ids, Counter(commented)
+            )
+            self.insert_comments(commented, post_ids, post_dates, user_ids)
+            self.insert("Подписок", Follow, ("user", "author"), follows)
+            self.insert_stats(user_ids, authors, follows)
+            if not options["skip_timelines"]:
+                self.fill_timelines(user_ids)
+        finally:
+            # Триггер возвращается и после ошибки, иначе новые записи
+            # перестали бы попадать в поиск до следующего migrate.
+            if search_enabled:
+                search.ensure_triggers(connection.alias)
+        if search_enabled:
+            self.report("Записей в поисковом индексе", len(post_ids))
+        # Новая общая версия сбрасывает все закэшированные ленты.
+        caching.bump(caching.ALL_FEEDS)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Данные созданы за {time.monotonic() - self.started:.1f} с."
+        ))
+
+    def insert_users(self, user_ids):
+        joined = self.date(self.start - timedelta(days=1))
+        self.insert(
+            "Пользователей",
+            User,
+            ("id", "password", "is_superuser", "username", "first_name",
+             "last_name", "email", "is_staff", "is_active", "date_joined"),
+            (
+                (pk, "!", False, f"user{pk}", "", "", "", False, True, joined)
+                for pk in user_ids
+            ),
+        )
+
+    def insert_groups(self, group_ids):
+        self.insert(
+            "Групп",
+            Group,
+            ("id", "title", "slug", "description"),
+            (
+                (pk, f"Группа {pk}", f"group-{pk}", " ".join(
+                    self.rng.choices(WORDS, k=12)
+                ))
+                for pk in group_ids
+            ),
+        )
+
+    def insert_posts(self, post_ids, authors, group_ids, comment_counts):
+        """Записи по возрастанию даты, как при обычной публикации.
+
+        Возвращает даты публикации в порядке post_ids.
+        """
+        step = (self.now - self.start) / len(post_ids)
+        group_weights = power_law_weights(len(group_ids), 1.0)
+        post_dates = []
+
+        def rows():
+            for index, (pk, author) in enumerate(zip(post_ids, authors)):
+                pub_date = self.start + step * index
+                post_dates.append(pub_date)
+                group = None
+                if self.rng.random() < 0.7:
+                    group = self.rng.choices(
+                        group_ids, cum_weights=group_weights
+                    )[0]
+                words = self.rng.choices(WORDS, k=self.rng.randint(5, 60))
+                date = self.date(pub_date)
+                yield (
+                    pk, " ".join(words).capitalize() + ".", date, author,
+                    group, "", "", "", date, comment_counts[pk],
+                )
+
+        self.insert(
+            "Записей",
+            Post,
+            ("id", "text", "pub_date", "author", "group", "image",
+             "original_image", "image_placeholder", "updated",
+             "comment_count"),
+            rows(),
+        )
+        return post_dates
+
+    def insert_comments(self, commented, post_ids, post_dates, user_ids):
+        def rows():
+            for post in commented:
+                # Комментарии приходят в первые часы после публикации.
+                delay = timedelta(minutes=self.rng.expovariate(1 / 120))
+                created = min(post_dates[post - post_ids[0]] + delay, self.now)
+                words = self.rng.choices(WORDS, k=self.rng.randint(2, 20))
+                yield (
+                    post,
+                    self.rng.choice(user_ids),
+                    " ".join(words),
+                    self.date(created),
+                )
+
+        self.insert(
+            "Комментариев",
+            Comment,
+            ("post", "author", "text", "created"),
+            rows(),
+        )
+
+    def insert_stats(self, user_ids, authors, follows):
+        posts_count = Counter(authors)
+        followers_count = Counter(author for _, author in follows)
+        following_count = Counter(user for user, _ in follows)
+        self.insert(
+            "Статистик авторов",
+            AuthorStats,
+            ("user", "posts_count", "followers_count", "following_count",
+             "pulled"),
+            (
+                (pk, posts_count[pk], followers_count[pk],
+                 following_count[pk], False)
+                for pk in user_ids
+            ),
+        )
+
+    def fill_timelines(self, user_ids):
+        """Ленты подписчиков обычных авторов, как после backfill.
+
+        Каждая подписка получает последние TIMELINE_BACKFILL_SIZE записей
+        автора; записи популярных авторов подмешиваются при чтении.
+        """
+        quote = connection.ops.quote_name
+        timeline = quote(TimelineEntry._meta.db_table)
+        follow = quote(Follow._meta.db_table)
+        post = quote(Post._meta.db_table)
+        stats = quote(AuthorStats._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {timeline} (user_id, post_id, author_id, pub_date)
+                SELECT f.user_id, p.id, p.author_id, p.pub_date
+                FROM {follow} f
+                JOIN (
+                    SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                        PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+                    ) AS position
+                    FROM {post}
+                    WHERE author_id IN (
+                        SELECT user_id FROM {stats}
+                        WHERE user_id BETWEEN %s AND %s
+                        AND followers_count <= %s
+                    )
+                ) p ON p.author_id = f.author_id
+                WHERE p.position <= %s
+                """,
+                [
+                    user_ids[0],
+                    user_ids[-1],
+                    settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+                    settings.TIMELINE_BACKFILL_SIZE,
+                ],
+            )
+            total = cursor.rowcount
+        self.report("Записей в лентах", total)
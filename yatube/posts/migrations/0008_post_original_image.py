@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='original_image',
+            field=models.FileField(blank=True, editable=False, upload_to='posts/originals/', verbose_name='Исходная картинка'),
+        ),
+    ]
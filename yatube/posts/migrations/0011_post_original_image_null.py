@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='original_image',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='posts/originals/', verbose_name='Исходная картинка'),
+        ),
+    ]
@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from yatube.db.routers import derived_write
 
 User = get_user_model()
 
@@ -22,6 +26,19 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        """Записи со всем, что нужно карточке записи, без запросов N+1."""
+        return self.select_related("author", "group")
+
+    def recount_comments(self):
+        """Пересчитывает сохраненное число комментариев у выборки."""
+        return self.update(
+            comment_count=_count_subquery(Comment.objects.all(), "post")
+        )
+
+
 class Post(models.Model):
 
     text = models.TextField(
@@ -52,12 +69,67 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    original_image = models.FileField(
+        verbose_name="Исходная картинка",
+        upload_to="posts/originals/",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_width = models.PositiveIntegerField(
+        verbose_name="Ширина картинки",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        verbose_name="Высота картинки",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    image_placeholder = models.TextField(
+        verbose_name="Заглушка картинки",
+        blank=True,
+        editable=False,
+    )
+    updated = models.DateTimeField(
+        verbose_name="Дата изменения",
+        auto_now=True,
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name="Число комментариев",
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: при переносе записи в другую группу
+        # нужно сбросить кэш обеих лент.
+        instance.loaded_group_id = instance.__dict__.get("group_id")
+        return instance
+
     class Meta:
         ordering = ["-pub_date"]
+        # Ленты группы и автора выбираются по ключу (pub_date, id) от
+        # новых к старым: индекс отдает строки сразу в нужном порядке.
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="posts_post_author_feed_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="posts_post_group_feed_idx",
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -83,6 +155,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["post", "-created"],
+                name="posts_comment_post_idx",
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -101,3 +179,148 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ("user", "author",)
+        # Подписчики автора: уникальный индекс (user, author) начинается
+        # с подписчика и для выборки по автору не подходит.
+        indexes = [
+            models.Index(
+                fields=["author", "user"],
+                name="posts_follow_author_idx",
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Запись в материализованной ленте подписок пользователя.
+
+    Заполняется при публикации (fan-out on write), дополняется при
+    подписке и подчищается при отписке. Дата публикации продублирована,
+    чтобы лента читалась по одному индексу без соединения с постами.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name="Читатель",
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name="Запись",
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name="Автор",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    pub_date = models.DateTimeField(
+        verbose_name="Дата публикации",
+    )
+
+    class Meta:
+        unique_together = ("user", "post",)
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="posts_timeline_feed_idx",
+            ),
+            models.Index(
+                fields=["user", "author"],
+                name="posts_timeline_author_idx",
+            ),
+        ]
+
+
+def _count_subquery(queryset, field):
+    """Число строк queryset на каждое значение field внешнего запроса."""
+    counts = queryset.filter(
+        **{field: OuterRef("pk")}
+    ).order_by().values(field).annotate(total=Count("pk"))
+    return Coalesce(Subquery(counts.values("total"), IntegerField()), 0)
+
+
+class AuthorStatsQuerySet(models.QuerySet):
+
+    def for_user_id(self, user_id):
+        """Статистика пользователя; при первом обращении считается."""
+        try:
+            return self.get(user_id=user_id)
+        except self.model.DoesNotExist:
+            pass
+        stats = self.model(user_id=user_id, **self.model.count_for(user_id))
+        # Статистику заводит и чтение: это не запись пользователя, и
+        # закреплять его за основной базой не нужно.
+        with derived_write():
+            try:
+                with transaction.atomic():
+                    stats.save(force_insert=True)
+            except IntegrityError:
+                return self.get(user_id=user_id)
+        return stats
+
+    def bump(self, user_id, **deltas):
+        """Сдвигает счетчики, если статистика уже заведена.
+
+        Отсутствующая статистика не создается: ее посчитает первое чтение,
+        а при каскадном удалении пользователя так не появится строк,
+        ссылающихся на удаляемую запись.
+        """
+        queryset = self.filter(user_id=user_id)
+        for field, delta in deltas.items():
+            if delta < 0:
+                # Разошедшийся счетчик не уходит ниже нуля, как и число
+                # комментариев: его исправит reconcile_author_stats.
+                queryset = queryset.filter(**{f"{field}__gte": -delta})
+        queryset.update(**{
+            field: F(field) + delta for field, delta in deltas.items()
+        })
+
+    def recount(self):
+        """Пересчитывает счетчики выборки по исходным таблицам."""
+        return self.update(
+            posts_count=_count_subquery(Post.objects.all(), "author"),
+            followers_count=_count_subquery(Follow.objects.all(), "author"),
+            following_count=_count_subquery(Follow.objects.all(), "user"),
+        )
+
+
+class AuthorStats(models.Model):
+    """Заранее посчитанные показатели автора для профиля и записи."""
+    user = models.OneToOneField(
+        User,
+        verbose_name="Автор",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Записей",
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Подписчиков",
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name="Подписок",
+        default=0,
+    )
+    # Часть лент не содержит записей автора: они подмешиваются при
+    # чтении, пока rebuild_timelines не разложит их (см. posts.timeline).
+    pulled = models.BooleanField(
+        verbose_name="Записи подмешиваются при чтении",
+        default=False,
+    )
+
+    objects = AuthorStatsQuerySet.as_manager()
+
+    @staticmethod
+    def count_for(user_id):
+        return {
+            "posts_count": Post.objects.filter(author_id=user_id).count(),
+            "followers_count": Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            "following_count": Follow.objects.filter(user_id=user_id).count(),
+        }
@@ -0,0 +1,205 @@
+import base64
+import binascii
+import math
+
+from django.core.paginator import Paginator
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from django.http import QueryDict
+from django.utils.dateparse import parse_datetime
+
+PAGE_PARAM = "page"
+AFTER_PARAM = "after"
+BEFORE_PARAM = "before"
+
+
+def encode_cursor(obj, date_field="pub_date"):
+    """Непрозрачный токен позиции объекта в ленте."""
+    value = f"{getattr(obj, date_field).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Разбор токена; для испорченного токена возвращает None."""
+    if not token:
+        return None
+    try:
+        value = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        date_string, pk = value.decode().split("|")
+        date, pk = parse_datetime(date_string), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+def keyset_filter(cursor, newer=False, date_field="pub_date", pk_field="id"):
+    """Условие «строго старше» (или «строго новее») курсора.
+
+    Записано через диапазон по дате, а не через OR, чтобы SQLite шел
+    по индексу в нужном порядке и не строил временное B-дерево.
+    """
+    date, pk = cursor
+    if newer:
+        return Q(**{f"{date_field}__gte": date}) & ~Q(
+            **{date_field: date, f"{pk_field}__lte": pk}
+        )
+    return Q(**{f"{date_field}__lte": date}) & ~Q(
+        **{date_field: date, f"{pk_field}__gte": pk}
+    )
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без OFFSET и COUNT(*).
+
+    Каждая страница — это один запрос с LIMIT per_page + 1 от позиции
+    курсора, поэтому глубокие страницы стоят столько же, сколько первая.
+    Старые ссылки вида ?page=N по-прежнему обслуживаются через OFFSET.
+
+    Пажинатор создается на каждый запрос и отдает обычный Page: число
+    страниц подставляется так, чтобы has_next/has_previous отвечали
+    найденным соседям, а курсоры соседних страниц хранятся в самом
+    пажинаторе (next_query/previous_query для шаблона).
+    """
+
+    date_field = "pub_date"
+    pk_field = "id"
+
+    def __init__(self, object_list, per_page, query_params=None):
+        super().__init__(object_list, per_page)
+        self.query_params = query_params or QueryDict()
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def encode_cursor(self, obj):
+        return encode_cursor(obj, self.date_field)
+
+    @property
+    def next_query(self):
+        """Строка запроса для ссылки «Следующая»."""
+        return self.build_query(AFTER_PARAM, self.next_cursor)
+
+    @property
+    def previous_query(self):
+        """Строка запроса для ссылки «Предыдущая»."""
+        return self.build_query(BEFORE_PARAM, self.previous_cursor)
+
+    def build_query(self, param, cursor):
+        query = self.query_params.copy()
+        for name in (PAGE_PARAM, AFTER_PARAM, BEFORE_PARAM):
+            query.pop(name, None)
+        query[param] = cursor
+        return query.urlencode()
+
+    def fetch(self, cursor=None, newer=False, offset=0, limit=None):
+        """Объекты после курсора: от новых к старым (newer — наоборот)."""
+        queryset = self.object_list
+        if cursor is not None:
+            queryset = queryset.filter(
+                keyset_filter(cursor, newer, self.date_field, self.pk_field)
+            )
+        ordering = (self.date_field, self.pk_field)
+        if not newer:
+            ordering = tuple(f"-{field}" for field in ordering)
+        return list(queryset.order_by(*ordering)[offset:offset + limit])
+
+    def get_page(self, number=None, after=None, before=None):
+        """Страница по курсору; без курсора — по номеру или первая."""
+        before_cursor = decode_cursor(before)
+        if before_cursor is not None:
+            objects = self.fetch(
+                before_cursor, newer=True, limit=self.per_page + 1
+            )
+            if len(objects) > self.per_page:
+                return self.build_page(
+                    objects[:self.per_page][::-1], 2, has_next=True
+                )
+            # Новее курсора меньше страницы: это и есть первая страница.
+            return self.get_page()
+
+        after_cursor = decode_cursor(after)
+        if after_cursor is not None:
+            objects = self.fetch(after_cursor, limit=self.per_page + 1)
+            return self.build_page(
+                objects[:self.per_page], 2, len(objects) > self.per_page
+            )
+
+        return self.get_numbered_page(number)
+
+    def get_numbered_page(self, number):
+        """Страница по номеру (?page=N) для старых ссылок."""
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        objects = self.fetch(
+            offset=(number - 1) * self.per_page, limit=self.per_page + 1
+        )
+        if not objects and number > 1:
+            # Как и Paginator.get_page: номер за концом — последняя страница.
+            last = max(math.ceil(self.count / self.per_page), 1)
+            if last < number:
+                return self.get_numbered_page(last)
+        return self.build_page(
+            objects[:self.per_page], number, len(objects) > self.per_page
+        )
+
+    def build_page(self, objects, number, has_next):
+        """Page с соседями, найденными без COUNT(*).
+
+        У курсорных страниц номер условный: 1 для первой, 2 для прочих.
+        """
+        self.num_pages = number + 1 if has_next else number
+        self.next_cursor = None
+        self.previous_cursor = None
+        if objects and has_next:
+            self.next_cursor = self.encode_cursor(objects[-1])
+        if objects and number > 1:
+            self.previous_cursor = self.encode_cursor(objects[0])
+        return self._get_page(objects, number, self)
+
+    def page_state(self, page):
+        """Компактное описание страницы для кэша: id и курсоры."""
+        return {
+            "ids": [obj.pk for obj in page.object_list],
+            "number": page.number,
+            "num_pages": self.num_pages,
+            "next_cursor": self.next_cursor,
+            "previous_cursor": self.previous_cursor,
+        }
+
+    def restore_page(self, state, objects):
+        """Page из описания page_state и загруженных объектов."""
+        self.num_pages = state["num_pages"]
+        self.next_cursor = state["next_cursor"]
+        self.previous_cursor = state["previous_cursor"]
+        return self._get_page(objects, state["number"], self)
+
+    def get_request_page(self, request):
+        """Страница по параметрам запроса page/after/before."""
+        self.query_params = request.GET
+        return self.get_page(
+            number=request.GET.get(PAGE_PARAM),
+            after=request.GET.get(AFTER_PARAM),
+            before=request.GET.get(BEFORE_PARAM),
+        )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пажинатор для больших таблиц: число строк оценивается.
+
+    Для всей таблицы оценка — наибольший id (один шаг по первичному
+    ключу; удаленные записи дают небольшой запас пустых страниц в конце).
+    Отфильтрованная выборка считается точно, но не дальше count_limit
+    строк, поэтому COUNT(*) никогда не проходит всю таблицу.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return queryset.order_by()[:self.count_limit].count()
+        return queryset.aggregate(last=Max("pk"))["last"] or 0
@@ -0,0 +1,85 @@
+"""Картинки записей в уменьшенных вариантах по запросу.
+
+Адрес варианта содержит ширину из settings.IMAGE_RESIZE_WIDTHS и имя
+файла картинки; имя у каждой загрузки свое, поэтому содержимое по адресу
+не меняется и кэшируется клиентами «навсегда». Готовые варианты лежат в
+settings.IMAGE_RESIZE_CACHE_DIR под именем — хэшем исходника и
+параметров; одновременные запросы нового варианта уменьшают картинку
+один раз, остальные ждут на блокировке файла.
+"""
+import hashlib
+import io
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from yatube.files import file_lock, write_atomic
+
+from .images import EXTENSIONS, encode
+
+SOURCE_PREFIX = "posts/"
+
+
+def is_allowed(width, name):
+    """Вариант из разрешенного списка для картинки записи."""
+    name = posixpath.normpath(name)
+    return (
+        width in settings.IMAGE_RESIZE_WIDTHS
+        and name.startswith(SOURCE_PREFIX)
+        and not name.startswith(settings.MEDIA_PRIVATE_PREFIXES)
+        and not name.startswith("..")
+    )
+
+
+def variant_key(width, name, source_size):
+    """Хэш исходника (имя и размер) и всех параметров кодирования."""
+    parts = (
+        name,
+        source_size,
+        width,
+        settings.IMAGE_FORMAT,
+        settings.IMAGE_QUALITY,
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def variant_path(key):
+    extension = EXTENSIONS.get(settings.IMAGE_FORMAT, "img")
+    return os.path.join(
+        settings.IMAGE_RESIZE_CACHE_DIR,
+        key[:2],
+        key[2:4],
+        f"{key}.{extension}",
+    )
+
+
+def resize(source, width):
+    """Байты картинки не шире width; меньшие картинки не увеличиваются."""
+    image = Image.open(io.BytesIO(source))
+    image.draft("RGB", (width, width * image.height // image.width or 1))
+    if image.width > width:
+        image.thumbnail((width, image.height), Image.LANCZOS)
+    return encode(image)
+
+
+def get_variant(width, name):
+    """Путь к готовому варианту и его ключ; строит вариант при нужде.
+
+    FileNotFoundError — исходной картинки нет.
+    """
+    if not default_storage.exists(name):
+        raise FileNotFoundError(name)
+    key = variant_key(width, name, default_storage.size(name))
+    path = variant_path(key)
+    if os.path.exists(path):
+        return path, key
+    with file_lock(path):
+        # Пока ждали блокировку, вариант мог построить другой запрос.
+        if not os.path.exists(path):
+            with default_storage.open(name, "rb") as file:
+                source = file.read()
+            write_atomic(path, resize(source, width))
+    return path, key
@@ -0,0 +1,181 @@
+"""Полнотекстовый поиск по записям.
+
+На SQLite используется индекс FTS5 posts_post_fts (см. миграцию 0007):
+он обновляется триггерами и отдает id записей, отсортированные по
+релевантности (bm25). На других базах поиск откатывается к icontains.
+"""
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+from django.http import QueryDict
+
+from .models import Post
+from .paginators import PAGE_PARAM
+
+QUERY_PARAM = "q"
+
+# SQLite выполняет AddField/AlterField пересозданием таблицы posts_post,
+# и триггеры при этом пропадают; после миграций они создаются заново.
+TRIGGERS = {
+    "posts_post_fts_insert": """
+        CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+    "posts_post_fts_delete": """
+        CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+    """,
+    "posts_post_fts_update": """
+        CREATE TRIGGER posts_post_fts_update AFTER UPDATE OF text
+        ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def fts_enabled():
+    return connection.vendor == "sqlite"
+
+
+def ensure_triggers(using="default"):
+    """Восстанавливает пропавшие триггеры индекса и перестраивает его."""
+    db = connections[using]
+    if db.vendor != "sqlite":
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            ["posts_post_fts%"],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if "posts_post_fts" not in existing:
+            return
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            # Пока триггеров не было, индекс мог разойтись с таблицей.
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+            )
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе FTS5.
+
+    Каждое слово берется в кавычки, поэтому операторы и спецсимволы из
+    ввода не ломают запрос; последнее слово ищется по префиксу.
+    """
+    words = _WORD_RE.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def filter_posts(queryset, query):
+    """Записи queryset, подходящие под запрос (без ранжирования)."""
+    match = match_expression(query)
+    if match is None:
+        return queryset.none()
+    if not fts_enabled():
+        return queryset.filter(text__icontains=query)
+    return queryset.filter(pk__in=RawSQL(
+        "SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s",
+        [match],
+    ))
+
+
+class SearchResults:
+    """Ленивая выборка найденных записей, отсортированных по рангу.
+
+    Paginator берет у нее count() и срез страницы: каждый срез — один
+    запрос к индексу за id и один за сами записи.
+    """
+
+    def __init__(self, query, queryset=None):
+        self.match = match_expression(query)
+        self.query = query
+        if queryset is None:
+            queryset = Post.objects.for_feed()
+        self.queryset = queryset
+
+    def count(self):
+        if self.match is None:
+            return 0
+        if not fts_enabled():
+            return filter_posts(self.queryset, self.query).count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM posts_post_fts "
+                "WHERE posts_post_fts MATCH %s",
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid FROM posts_post_fts "
+                "WHERE posts_post_fts MATCH %s "
+                "ORDER BY rank LIMIT %s OFFSET %s",
+                [self.match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("SearchResults поддерживает только срезы.")
+        offset, limit = index.start or 0, index.stop - (index.start or 0)
+        if self.match is None:
+            return []
+        if not fts_enabled():
+            return list(filter_posts(self.queryset, self.query).order_by(
+                "-pub_date", "-id"
+            )[offset:offset + limit])
+        ids = self.ranked_ids(offset, limit)
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class SearchPaginator(Paginator):
+    """Нумерованные страницы результатов поиска.
+
+    Ссылки next_query/previous_query те же, что у ленточных пажинаторов,
+    поэтому подходит общий шаблон paginator.html.
+    """
+
+    def __init__(self, object_list, per_page, query_params=None):
+        super().__init__(object_list, per_page)
+        self.query_params = query_params or QueryDict()
+        self.current = 1
+
+    def page(self, number):
+        page = super().page(number)
+        self.current = page.number
+        return page
+
+    @property
+    def next_query(self):
+        return self.build_query(self.current + 1)
+
+    @property
+    def previous_query(self):
+        return self.build_query(self.current - 1)
+
+    def build_query(self, number):
+        query = self.query_params.copy()
+        query[PAGE_PARAM] = number
+        return query.urlencode()
@@ -0,0 +1,98 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import caching, search, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post
+
+# Порядок действий внутри обработчика важен: счетчики сдвигаются до того,
+# как лента может впервые посчитать статистику автора.
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Новая запись меняет состав лент, правка — только саму запись."""
+    if raw:
+        return
+    if created:
+        AuthorStats.objects.bump(instance.author_id, posts_count=1)
+        timeline.fan_out_post(instance)
+        caching.bump_post_feeds(instance.author_id, [instance.group_id])
+        return
+
+    caching.forget_post(instance.pk)
+    loaded_group_id = getattr(instance, "loaded_group_id", None)
+    if loaded_group_id != instance.group_id:
+        caching.bump(
+            caching.group_feed(instance.group_id),
+            caching.group_feed(loaded_group_id),
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Удаленная запись уменьшает счетчик автора."""
+    AuthorStats.objects.bump(instance.author_id, posts_count=-1)
+    caching.forget_post(instance.pk)
+    caching.bump_post_feeds(instance.author_id, [instance.group_id])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    """Подписка: счетчики обеих сторон и последние записи в ленту."""
+    if created and not raw:
+        AuthorStats.objects.bump(instance.author_id, followers_count=1)
+        AuthorStats.objects.bump(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        caching.bump(
+            caching.follow_feed(instance.user_id),
+            caching.stats_feed(instance.user_id),
+            caching.stats_feed(instance.author_id),
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Отписка: счетчики обеих сторон и записи автора из ленты."""
+    AuthorStats.objects.bump(instance.author_id, followers_count=-1)
+    AuthorStats.objects.bump(instance.user_id, following_count=-1)
+    timeline.trim(instance.user_id, instance.author_id)
+    caching.bump(
+        caching.follow_feed(instance.user_id),
+        caching.stats_feed(instance.user_id),
+        caching.stats_feed(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    """Новый комментарий увеличивает счетчик записи."""
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F("comment_count") + 1
+        )
+        caching.forget_post(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Удаленный комментарий уменьшает счетчик записи."""
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F("comment_count") - 1)
+    caching.forget_post(instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    """Название группы выводится в карточках всех лент."""
+    if not raw:
+        caching.bump(caching.ALL_FEEDS)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Пересоздание таблицы записей в миграциях удаляет триггеры поиска."""
+    if sender.label == "posts":
+        search.ensure_triggers(using)
@@ -0,0 +1,30 @@
+from django import template
+from django.conf import settings
+from django.urls import reverse
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, preset):
+    """Готовая миниатюра картинки или None; миниатюра здесь не строится."""
+    if not image:
+        return None
+    return thumbnails.lookup(image, preset)
+
+
+@register.simple_tag
+def image_srcset(post):
+    """srcset из уменьшенных вариантов картинки, не шире исходной."""
+    widths = [
+        width for width in settings.IMAGE_RESIZE_WIDTHS
+        if not post.image_width or width < post.image_width
+    ]
+    return ", ".join(
+        "{} {}w".format(
+            reverse("resized_image", args=[width, post.image.name]), width
+        )
+        for width in widths
+    )
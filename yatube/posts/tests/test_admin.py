@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import EstimatedCountPaginator
+
+
+class AdminChangelistTest(TestCase):
+    """Списки админки не зависят от числа строк по числу запросов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="admin"
+        )
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_group",
+            description="Описание тестовой группы",
+        )
+        authors = [
+            User.objects.create(username=f"author_{i}") for i in range(5)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.admin, author=author)
+            post = Post.objects.create(
+                text="Запись", author=author, group=cls.group
+            )
+            Comment.objects.create(post=post, author=author, text="Текст")
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(AdminChangelistTest.admin)
+
+    def test_changelists_fit_query_budget(self):
+        """Строки списка не порождают запросов за связанными объектами."""
+        for model in ("post", "group", "comment", "follow"):
+            with self.subTest(model=model):
+                url = reverse(f"admin:posts_{model}_changelist")
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context["cl"].result_list)
+                # Сессия, пользователь, оценка числа строк и сами строки.
+                self.assertLessEqual(
+                    len(queries),
+                    5,
+                    "\n".join(query["sql"] for query in queries),
+                )
+
+    def test_foreign_keys_do_not_list_all_rows(self):
+        """В форме записи нет выпадающего списка всех пользователей."""
+        post = Post.objects.first()
+        response = self.client.get(
+            reverse("admin:posts_post_change", args=[post.pk])
+        )
+        self.assertNotContains(response, "author_4</option>")
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    """Оценка числа строк не требует полного COUNT(*)."""
+
+    def test_counts(self):
+        User = get_user_model()  # noqa
+        users = [User.objects.create(username=f"user_{i}") for i in range(5)]
+        users[1].delete()
+
+        paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 2)
+        self.assertEqual(paginator.count, users[-1].pk)
+
+        paginator = EstimatedCountPaginator(
+            User.objects.filter(username__startswith="user").order_by("pk"),
+            2,
+        )
+        paginator.count_limit = 3
+        self.assertEqual(paginator.count, 3)
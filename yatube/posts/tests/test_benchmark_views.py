@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.management.commands.benchmark_views import (
+    VIEWS, compare, percentile
+)
+from posts.models import Comment, Post
+
+
+class BenchmarkViewsTest(TestCase):
+    """Команда benchmark_views пишет отчет и находит регрессии."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            "seed_data", users=20, groups=2, posts=60, follows=60,
+            comments=60, stdout=StringIO(),
+        )
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.report = os.path.join(directory, "report.json")
+
+    def benchmark(self, **options):
+        call_command(
+            "benchmark_views", repeat=3, warmup=0, output=self.report,
+            stdout=StringIO(), stderr=StringIO(), **options,
+        )
+        with open(self.report) as file:
+            return json.load(file)
+
+    def test_report(self):
+        """В отчете перцентили, запросы и отрисовка для каждого вида."""
+        report = self.benchmark()
+
+        results = report["results"]["current"]
+        self.assertEqual(set(results), set(VIEWS))
+        for view, metrics in results.items():
+            with self.subTest(view=view):
+                self.assertEqual(metrics["requests"], 3)
+                self.assertLessEqual(metrics["p50"], metrics["p95"])
+                self.assertLessEqual(metrics["p95"], metrics["p99"])
+                self.assertGreater(metrics["queries"], 0)
+        self.assertGreater(results["index"]["render_p50"], 0)
+        self.assertEqual(results["new_post"]["render_p50"], 0)
+
+    def test_writes_are_rolled_back(self):
+        """Замеры new_post и add_comment не оставляют данных в базе."""
+        counts = Post.objects.count(), Comment.objects.count()
+
+        self.benchmark(views=["new_post", "add_comment"])
+
+        self.assertEqual(
+            (Post.objects.count(), Comment.objects.count()), counts
+        )
+
+    def test_regression_against_baseline(self):
+        """Рост p95 сверх порога относительно базы — ошибка команды."""
+        baseline = self.benchmark(views=["index"])
+        baseline["results"]["current"]["index"]["p95"] = 0.001
+        with open(self.report, "w") as file:
+            json.dump(baseline, file)
+
+        with self.assertRaises(CommandError):
+            self.benchmark(views=["index"], baseline=self.report)
+
+    def test_compare(self):
+        """Сравниваются p95 и число запросов с учетом порога."""
+        base = {"10": {"index": {"p95": 10.0, "queries": 4}}}
+        current = {"10": {
+            "index": {"p95": 11.0, "queries": 6},
+            "profile": {"p95": 100.0, "queries": 100},
+        }}
+
+        regressions = compare(current, base, 0.2)
+
+        self.assertEqual(
+            [(item["view"], item["metric"]) for item in regressions],
+            [("index", "queries")],
+        )
+
+    def test_percentile(self):
+        """Перцентиль по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
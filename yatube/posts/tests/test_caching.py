@@ -0,0 +1,81 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from posts.caching import get_or_build
+
+
+class GetOrBuildTest(SimpleTestCase):
+    """Горячий ключ пересобирается одним запросом."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_value_is_built_once(self):
+        """Повторный запрос берет значение из кэша."""
+        build = mock.Mock(return_value="значение")
+        for _ in range(3):
+            self.assertEqual(get_or_build("key", build, 60), "значение")
+        build.assert_called_once()
+
+    def test_stale_value_while_locked(self):
+        """Пока другой запрос пересобирает, отдается старое значение."""
+        get_or_build("old-key", lambda: "старое", 60, stale_key="stale")
+        cache.add("new-key-lock", True)
+        build = mock.Mock(return_value="новое")
+
+        value = get_or_build("new-key", build, 60, stale_key="stale")
+
+        self.assertEqual(value, "старое")
+        build.assert_not_called()
+
+    @override_settings(CACHE_LOCK_WAIT=0.2)
+    def test_build_after_wait_timeout(self):
+        """Если блокировку не отпустили, значение собирается без нее."""
+        cache.add("key-lock", True)
+        value = get_or_build("key", lambda: "значение", 60)
+
+        self.assertEqual(value, "значение")
+        self.assertTrue(cache.get("key-lock"))
+
+    def test_concurrent_requests_build_once(self):
+        """Одновременные промахи пересобирают значение один раз."""
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return "значение"
+
+        values = []
+        threads = [
+            threading.Thread(
+                target=lambda: values.append(get_or_build("key", build, 60))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(values, ["значение"] * 5)
+
+    def test_early_refresh_near_expiry(self):
+        """Незадолго до истечения значение обновляется заранее."""
+        get_or_build("key", lambda: "старое", 60)
+        entry = cache.get("key")
+        entry["expires"] = time.time() + 1
+        entry["delta"] = 1
+        cache.set("key", entry, 60)
+
+        with mock.patch("posts.caching.random.random", return_value=0.0):
+            value = get_or_build("key", lambda: "новое", 60)
+        self.assertEqual(value, "старое")
+        with mock.patch("posts.caching.random.random", return_value=0.99):
+            value = get_or_build("key", lambda: "новое", 60)
+        self.assertEqual(value, "новое")
@@ -0,0 +1,113 @@
+import gzip
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import reverse
+from django.test import Client, RequestFactory, TestCase
+
+from posts.models import Post
+from yatube.middleware import CompressionMiddleware
+
+
+class CompressionTest(TestCase):
+    """HTML и JSON сжимаются для клиентов, которые принимают gzip."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.author = User.objects.create(username="author")
+        Post.objects.bulk_create(
+            Post(text=f"Запись номер {number}", author=cls.author)
+            for number in range(10)
+        )
+        cls.post = Post.objects.latest("pk")
+        cls.post_url = reverse(
+            "post",
+            kwargs={"username": cls.author.username, "post_id": cls.post.pk},
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get(self, url, **extra):
+        return self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", **extra)
+
+    def test_feed_is_compressed(self):
+        """Лента сжимается, а без Accept-Encoding отдается как есть."""
+        plain = self.client.get(reverse("index"))
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.get(reverse("index"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(
+            int(response["Content-Length"]), len(response.content)
+        )
+
+    def test_validators_survive_compression(self):
+        """ETag сжатого ответа слабый, но по нему приходит 304."""
+        url = reverse("index")
+        response = self.get(url)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = self.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_csrf_pages_get_random_padding(self):
+        """Длина страниц с токеном CSRF меняется от ответа к ответу."""
+        self.client.force_login(CompressionTest.author)
+        lengths = set()
+        for _ in range(10):
+            response = self.get(CompressionTest.post_url)
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn(b"csrfmiddlewaretoken", gzip.decompress(
+                response.content
+            ))
+            lengths.add(len(response.content))
+        self.assertGreater(len(lengths), 1)
+
+    def test_small_and_foreign_responses_are_not_compressed(self):
+        """Маленькие ответы и ответы других типов не сжимаются."""
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        middleware = CompressionMiddleware()
+        responses = (
+            HttpResponse("<p>коротко</p>"),
+            HttpResponse(b"x" * 5000, content_type="image/png"),
+        )
+        for response in responses:
+            with self.subTest(content_type=response["Content-Type"]):
+                response = middleware.process_response(request, response)
+                self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streaming_response(self):
+        """Потоковый ответ сжимается по частям, без Content-Length."""
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        chunks = [b"<p>%d</p>" % number * 200 for number in range(5)]
+        response = StreamingHttpResponse(iter(chunks))
+        response["Content-Length"] = sum(map(len, chunks))
+
+        response = CompressionMiddleware().process_response(
+            request, response
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), len(chunks))
+        self.assertEqual(gzip.decompress(b"".join(parts)), b"".join(chunks))
+
+    def test_benchmark_command(self):
+        """Команда сравнивает размеры и время сжатия страниц."""
+        stdout = StringIO()
+        call_command(
+            "benchmark_compression", levels=[1, 9], repeat=1, stdout=stdout
+        )
+        output = stdout.getvalue()
+        for name in ("index", "profile", "post", "gzip-9"):
+            self.assertIn(name, output)
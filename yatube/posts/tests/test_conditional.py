@@ -0,0 +1,117 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.test import Client, TestCase
+
+from posts import caching
+from posts.models import Comment, Follow, Post
+
+
+class ConditionalGetTest(TestCase):
+    """Неизмененные страницы отдаются ответом 304."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.author = User.objects.create(username="author")
+        cls.reader = User.objects.create(username="reader")
+        cls.post = Post.objects.create(text="Запись", author=cls.author)
+
+        cls.index_url = reverse("index")
+        cls.profile_url = reverse(
+            "profile", kwargs={"username": cls.author.username}
+        )
+        cls.post_url = reverse(
+            "post",
+            kwargs={"username": cls.author.username, "post_id": cls.post.pk},
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    @contextmanager
+    def seconds_later(self, seconds):
+        """Часы валидаторов на seconds секунд впереди."""
+        with mock.patch("posts.conditional.time") as clock:
+            clock.time.return_value = time.time() + seconds
+            yield
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Повторный запрос с ETag или датой получает 304."""
+        urls = (
+            ConditionalGetTest.index_url,
+            ConditionalGetTest.profile_url,
+            ConditionalGetTest.post_url,
+        )
+        for url in urls:
+            with self.subTest(url=url), self.seconds_later(2):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_no_last_modified_within_the_second_of_change(self):
+        """Пока идет секунда изменения, дата изменения не отдается."""
+        url = ConditionalGetTest.index_url
+        with self.seconds_later(0):
+            response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+    def test_stale_page_has_no_validators(self):
+        """Прежняя страница, отданная во время пересборки, идет без ETag."""
+        url = ConditionalGetTest.index_url
+        self.client.get(url)
+        Post.objects.create(text="Новая", author=ConditionalGetTest.author)
+
+        # Страницу новой версии уже пересобирает другой запрос.
+        with mock.patch.object(caching.cache, "add", return_value=False):
+            response = self.client.get(url)
+
+        self.assertNotContains(response, "Новая")
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+    def test_writes_change_validators(self):
+        """Новая запись, комментарий и подписка меняют ETag."""
+        url = ConditionalGetTest.index_url
+        response = self.client.get(url)
+        Post.objects.create(text="Новая", author=ConditionalGetTest.author)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+        url = ConditionalGetTest.post_url
+        response = self.client.get(url)
+        Comment.objects.create(
+            post=ConditionalGetTest.post,
+            author=ConditionalGetTest.reader,
+            text="Комментарий",
+        )
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+        url = ConditionalGetTest.profile_url
+        response = self.client.get(url)
+        Follow.objects.create(
+            user=ConditionalGetTest.reader, author=ConditionalGetTest.author
+        )
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Гость и пользователь получают разные ETag."""
+        url = ConditionalGetTest.index_url
+        response = self.client.get(url)
+        self.client.force_login(ConditionalGetTest.reader)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase, TestCase
+
+ALIAS = "concurrency"
+
+
+class ConcurrentWritesTest(SimpleTestCase):
+    """Смешанная нагрузка чтения и записи обходится без блокировок."""
+
+    writers = 4
+    readers = 4
+    transactions = 30
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        connections.databases[ALIAS] = dict(
+            connections.databases["default"],
+            NAME=os.path.join(self.directory, "db.sqlite3"),
+            CONN_MAX_AGE=0,
+        )
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE item (id INTEGER PRIMARY KEY, value INTEGER)"
+            )
+
+    def tearDown(self):
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.databases[ALIAS]
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def run_threads(self, *targets):
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connections[ALIAS].close()
+
+        threads = [
+            threading.Thread(target=run, args=(target,)) for target in targets
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def write(self):
+        # Чтение перед записью в одной транзакции — как в представлениях,
+        # которые проверяют данные и сохраняют модель.
+        for number in range(self.transactions):
+            with transaction.atomic(using=ALIAS):
+                with connections[ALIAS].cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM item")
+                    cursor.execute(
+                        "INSERT INTO item (value) VALUES (%s)", [number]
+                    )
+
+    def read(self):
+        for _ in range(self.transactions * 2):
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute("SELECT COUNT(*), SUM(value) FROM item")
+
+    def test_pragmas_are_applied(self):
+        """Соединение открывается с настройками из SQLITE_PRAGMAS."""
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_mixed_load_without_lock_errors(self):
+        """Одновременные транзакции записи ждут очереди, а не падают."""
+        errors = self.run_threads(
+            *[self.write] * self.writers, *[self.read] * self.readers
+        )
+
+        self.assertEqual(errors, [])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM item")
+            self.assertEqual(
+                cursor.fetchone()[0], self.writers * self.transactions
+            )
+
+
+class OptimizeDatabaseCommandTest(TestCase):
+    """Команда обслуживания обновляет статистику базы."""
+
+    def test_optimize_database(self):
+        """Выборочная и полная пересборка статистики."""
+        cases = (({}, "PRAGMA optimize"), ({"analyze": True}, "ANALYZE"))
+        for options, statement in cases:
+            with self.subTest(**options):
+                stdout = StringIO()
+                call_command("optimize_database", stdout=stdout, **options)
+                self.assertIn(statement, stdout.getvalue())
@@ -1,3 +1,4 @@
+import io
 import shutil
 import tempfile
 
@@ -6,7 +7,9 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.shortcuts import reverse
 from django.test import Client, TestCase, override_settings
 from django.core.cache import cache
+from PIL import Image
 
+from posts.forms import PostForm
 from posts.models import Group, Post, Comment
 
 MEDIA_ROOT = tempfile.mkdtemp()
@@ -251,3 +254,86 @@ class CommentsFormsTest(TestCase):
                 text=self.form_data["text"]
             ).exists()
         )
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_MAX_SIZE=(100, 100),
+    IMAGE_FORMAT="WEBP",
+    IMAGE_KEEP_ORIGINAL=False,
+)
+class ImageNormalizationTest(TestCase):
+    """Загруженные картинки уменьшаются и перекодируются."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def photo(self, size=(400, 200)):
+        image = Image.new("RGB", size, (200, 30, 30))
+        exif = Image.Exif()
+        exif[0x010F] = "Камера"
+        output = io.BytesIO()
+        image.save(output, "JPEG", exif=exif.tobytes())
+        return SimpleUploadedFile(
+            "photo.jpg", output.getvalue(), content_type="image/jpeg"
+        )
+
+    def clean_image(self, upload):
+        form = PostForm(data={"text": "Запись"}, files={"image": upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_large_photo_is_normalized(self):
+        """Фото уменьшается, теряет EXIF и сохраняется в WEBP."""
+        form = self.clean_image(self.photo())
+        image = form.cleaned_data["image"]
+        self.assertTrue(image.name.endswith(".webp"))
+
+        result = Image.open(io.BytesIO(image.read()))
+        self.assertEqual(result.format, "WEBP")
+        self.assertEqual(result.size, (100, 50))
+        self.assertFalse(result.getexif())
+        self.assertFalse(form.instance.original_image)
+
+    def test_image_info_is_stored(self):
+        """Размеры и заглушка картинки сохраняются в записи."""
+        form = self.clean_image(self.photo())
+        form.instance.author = get_user_model().objects.create(
+            username="author"
+        )
+        post = form.save()
+
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+        self.assertTrue(
+            post.image_placeholder.startswith("data:image/webp;base64,")
+        )
+        self.assertLess(len(post.image_placeholder), 1000)
+
+    def test_small_clean_image_is_kept(self):
+        """Маленькая картинка без метаданных сохраняется как есть."""
+        upload = SimpleUploadedFile(
+            "small.gif",
+            b"\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00"
+            b"\x00\x00\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C"
+            b"\x00\x00\x00\x00\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00"
+            b"\x3B",
+        )
+
+        image = self.clean_image(upload).cleaned_data["image"]
+        self.assertIs(image, upload)
+
+    @override_settings(IMAGE_KEEP_ORIGINAL=True)
+    def test_original_is_kept_when_configured(self):
+        """Исходник сохраняется рядом, если это включено в настройках."""
+        upload = self.photo()
+        form = self.clean_image(upload)
+        form.instance.author = get_user_model().objects.create(
+            username="author"
+        )
+        post = form.save()
+
+        self.assertTrue(post.original_image.name.startswith("posts/originals"))
+        upload.seek(0)
+        self.assertEqual(post.original_image.read(), upload.read())
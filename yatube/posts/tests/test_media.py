@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import Client, SimpleTestCase, override_settings
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_SENDFILE=None)
+class MediaServingTest(SimpleTestCase):
+    """Загруженные файлы отдаются и без DEBUG."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.name = default_storage.save(
+            "posts/file.txt", ContentFile(b"0123456789" * 10)
+        )
+        cls.url = "/media/" + cls.name
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_file_response(self):
+        """Файл отдается целиком, с валидаторами и кэшированием."""
+        response = self.client.get(MediaServingTest.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b"".join(response.streaming_content), b"0123456789" * 10
+        )
+        self.assertIn("max-age=", response["Cache-Control"])
+
+        response = self.client.get(
+            MediaServingTest.url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_request(self):
+        """Запрос части файла получает 206 и ровно эти байты."""
+        response = self.client.get(
+            MediaServingTest.url, HTTP_RANGE="bytes=5-14"
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(
+            b"".join(response.streaming_content), b"5678901234"
+        )
+
+        response = self.client.get(MediaServingTest.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+    def test_missing_and_outside_files(self):
+        """Отсутствующие файлы и пути вне MEDIA_ROOT дают 404."""
+        for url in ("/media/posts/missing.txt", "/media/../manage.py"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_private_files(self):
+        """Исходники картинок не отдаются ни по какому пути."""
+        name = default_storage.save(
+            "posts/originals/photo.jpg", ContentFile(b"exif")
+        )
+        self.addCleanup(default_storage.delete, name)
+        for url in (
+            f"/media/{name}",
+            f"/media/{name.replace('posts/', 'posts/./')}",
+            f"/media/{name.replace('posts/', 'posts//')}",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(
+        MEDIA_SENDFILE="x-accel-redirect",
+        MEDIA_ACCEL_REDIRECT_PREFIX="/protected/",
+    )
+    def test_x_accel_redirect(self):
+        """С nginx файл отдает веб-сервер."""
+        response = self.client.get(MediaServingTest.url)
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected/" + MediaServingTest.name
+        )
+        self.assertEqual(response.content, b"")
+
+    @override_settings(MEDIA_SENDFILE="x-sendfile")
+    def test_x_sendfile(self):
+        """С Apache файл отдается по X-Sendfile."""
+        response = self.client.get(MediaServingTest.url)
+        self.assertEqual(
+            response["X-Sendfile"], default_storage.path(MediaServingTest.name)
+        )
@@ -1,6 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
-from posts.models import Group, Post
+from posts.models import AuthorStats, Comment, Follow, Group, Post
 
 
 class GroupModelTest(TestCase):
@@ -46,3 +50,153 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         expect_str = "Тестовая запись"
         self.assertEqual(post.__str__(), expect_str)
+
+
+class CommentCountTest(TestCase):
+    """Сохраненное число комментариев записи"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()
+
+        cls.user = User.objects.create(username="test_user")
+        cls.post = Post.objects.create(text="Запись", author=cls.user)
+
+    def test_counter_follows_comments(self):
+        """Счетчик меняется при добавлении и удалении комментариев"""
+        post = CommentCountTest.post
+        comment = Comment.objects.create(
+            post=post, author=CommentCountTest.user, text="Первый"
+        )
+        Comment.objects.create(
+            post=post, author=CommentCountTest.user, text="Второй"
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 2)
+
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        """Команда восстанавливает разошедшийся счетчик"""
+        post = CommentCountTest.post
+        Comment.objects.create(
+            post=post, author=CommentCountTest.user, text="Комментарий"
+        )
+        Post.objects.filter(pk=post.pk).update(comment_count=42)
+
+        call_command(
+            "rebuild_comment_counts", chunk_size=1, stdout=StringIO()
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+
+class AuthorStatsTest(TestCase):
+    """Статистика автора"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()
+
+        cls.author = User.objects.create(username="author")
+        cls.reader = User.objects.create(username="reader")
+
+    def test_stats_follow_posts_and_follows(self):
+        """Счетчики меняются вместе с записями и подписками"""
+        author = AuthorStatsTest.author
+        reader = AuthorStatsTest.reader
+        Post.objects.create(text="Первая", author=author)
+        AuthorStats.objects.for_user_id(author.pk)
+        AuthorStats.objects.for_user_id(reader.pk)
+
+        post = Post.objects.create(text="Вторая", author=author)
+        Follow.objects.create(user=reader, author=author)
+        self.assertEqual(
+            AuthorStats.count_for(author.pk),
+            {"posts_count": 2, "followers_count": 1, "following_count": 0},
+        )
+        stats = AuthorStats.objects.get(user=author)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (2, 1)
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=reader).following_count, 1
+        )
+
+        post.delete()
+        Follow.objects.filter(user=reader, author=author).delete()
+        stats.refresh_from_db()
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (1, 0)
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=reader).following_count, 0
+        )
+
+    def test_drifted_counters_do_not_go_negative(self):
+        """Отписка и удаление при нулевых счетчиках не падают"""
+        author = AuthorStatsTest.author
+        reader = AuthorStatsTest.reader
+        post = Post.objects.create(text="Запись", author=author)
+        Follow.objects.create(user=reader, author=author)
+        AuthorStats.objects.for_user_id(author.pk)
+        AuthorStats.objects.filter(user=author).update(
+            posts_count=0, followers_count=0
+        )
+
+        post.delete()
+        Follow.objects.filter(user=reader, author=author).delete()
+
+        stats = AuthorStats.objects.get(user=author)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count), (0, 0)
+        )
+
+    def test_delete_user_with_posts_and_follows(self):
+        """Пользователь удаляется с записями, подписками и комментариями"""
+        User = get_user_model()
+        user = User.objects.create(username="leaving")
+        author = AuthorStatsTest.author
+        reader = AuthorStatsTest.reader
+        post = Post.objects.create(text="Запись", author=user)
+        Comment.objects.create(post=post, author=reader, text="Комментарий")
+        Comment.objects.create(
+            post=Post.objects.create(text="Чужая", author=author),
+            author=user,
+            text="Свой",
+        )
+        Follow.objects.create(user=user, author=author)
+        Follow.objects.create(user=reader, author=user)
+
+        user_id = user.pk
+        user.delete()
+
+        # Внешние ключи в SQLite проверяются при фиксации транзакции.
+        connection.check_constraints()
+        self.assertFalse(AuthorStats.objects.filter(user_id=user_id).exists())
+        self.assertEqual(
+            AuthorStats.objects.get(user=author).followers_count, 0
+        )
+
+    def test_reconcile_command_fixes_drift(self):
+        """Команда сверки исправляет расхождения и заводит статистику"""
+        author = AuthorStatsTest.author
+        Post.objects.create(text="Запись", author=author)
+        AuthorStats.objects.for_user_id(author.pk)
+        AuthorStats.objects.filter(user=author).update(posts_count=42)
+
+        call_command(
+            "reconcile_author_stats", batch_size=1, stdout=StringIO()
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=author).posts_count, 1
+        )
+        self.assertTrue(
+            AuthorStats.objects.filter(user=AuthorStatsTest.reader).exists()
+        )
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.test import Client, TestCase
+
+from posts.models import Post
+from posts.paginators import KeysetPaginator, decode_cursor, encode_cursor
+
+
+class KeysetPaginatorTest(TestCase):
+    """Пажинатор по курсору работает корректно."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.user = User.objects.create(username="test_user")
+
+        # Одинаковая pub_date у всех записей: порядок задает только id.
+        Post.objects.bulk_create([
+            Post(text=f"Запись {i}", author=cls.user) for i in range(25)
+        ])
+        cls.ordered_ids = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.paginator = KeysetPaginator(Post.objects.all(), 10)
+
+    def test_cursor_roundtrip(self):
+        """Курсор кодируется и разбирается без потерь."""
+        post = Post.objects.first()
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.pub_date, post.pk)
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор приводит на первую страницу."""
+        for token in ("", "мусор", "bm90LWEtZGF0ZXwx", "!!!"):
+            with self.subTest(token=token):
+                page = self.paginator.get_page(after=token)
+                self.assertFalse(page.has_previous())
+                self.assertEqual(
+                    [post.pk for post in page], self.ordered_ids[:10]
+                )
+
+    def test_walk_forward_and_back(self):
+        """Проход по курсорам вперед и назад дает те же страницы."""
+        page = self.paginator.get_page()
+        pages = [[post.pk for post in page]]
+        cursors = [self.paginator.previous_cursor]
+        while page.has_next():
+            page = self.paginator.get_page(after=self.paginator.next_cursor)
+            pages.append([post.pk for post in page])
+            cursors.append(self.paginator.previous_cursor)
+
+        self.assertEqual([len(ids) for ids in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), self.ordered_ids)
+        self.assertIsNone(cursors[0])
+
+        page = self.paginator.get_page(before=cursors[2])
+        self.assertEqual([post.pk for post in page], pages[1])
+        self.assertTrue(page.has_previous())
+
+        page = self.paginator.get_page(before=cursors[1])
+        self.assertEqual([post.pk for post in page], pages[0])
+        self.assertFalse(page.has_previous())
+
+    def test_numbered_page_is_still_supported(self):
+        """Старые ссылки ?page=N работают, номер за концом — последняя."""
+        page = self.paginator.get_page(number="2")
+        self.assertEqual([post.pk for post in page], self.ordered_ids[10:20])
+        self.assertTrue(page.has_previous())
+
+        page = self.paginator.get_page(number="100")
+        self.assertEqual([post.pk for post in page], self.ordered_ids[20:])
+
+    def test_page_links_keep_other_params(self):
+        """Ссылки пажинатора сохраняют прочие параметры запроса."""
+        response = self.client.get(reverse("index") + "?page=1&q=test")
+        page = response.context["page"]
+        self.assertIn("q=test", page.paginator.next_query)
+        self.assertNotIn("page=", page.paginator.next_query)
+
+        next_query = page.paginator.next_query
+        response = self.client.get(reverse("index") + "?" + next_query)
+        self.assertEqual(
+            [post.pk for post in response.context["page"]],
+            self.ordered_ids[10:20],
+        )
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class QueryBudgetTest(TestCase):
+    """Число SQL-запросов страниц не зависит от числа записей на них."""
+
+    # Запросы сессии и пользователя входят в бюджет.
+    budgets = {
+        "index": 3,
+        "group_posts": 4,
+        "profile": 6,
+        "follow_index": 5,
+        "post": 6,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.reader = User.objects.create(username="reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test_group",
+            description="Описание тестовой группы",
+        )
+        authors = [
+            User.objects.create(username=f"author_{i}") for i in range(3)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+        for i in range(15):
+            post = Post.objects.create(
+                text=f"Запись {i}",
+                author=authors[i % len(authors)],
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text="Комментарий"
+            )
+        cls.author = post.author
+
+        cls.urls = {
+            "index": reverse("index"),
+            "group_posts": reverse(
+                "group_posts", kwargs={"slug": cls.group.slug}
+            ),
+            "profile": reverse(
+                "profile", kwargs={"username": cls.author.username}
+            ),
+            "follow_index": reverse("follow_index"),
+            "post": reverse(
+                "post",
+                kwargs={"username": cls.author.username, "post_id": post.pk},
+            ),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(QueryBudgetTest.reader)
+
+    def test_feed_views_fit_query_budget(self):
+        """Страницы укладываются в фиксированное число запросов."""
+        for name, url in QueryBudgetTest.urls.items():
+            with self.subTest(view=name):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    len(queries),
+                    QueryBudgetTest.budgets[name],
+                    "\n".join(query["sql"] for query in queries),
+                )
+
+    def test_feed_page_shows_comment_count(self):
+        """Число комментариев хранится в самой записи."""
+        response = self.client.get(QueryBudgetTest.urls["index"])
+        for post in response.context["page"]:
+            with self.subTest(post=post.pk):
+                self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import AFTER_PARAM, PAGE_PARAM, encode_cursor
+
+
+def explain(sql):
+    """Строки плана запроса из EXPLAIN QUERY PLAN."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Полные проходы таблиц и сортировки во временном B-дереве."""
+    return [
+        step for step in plan
+        if step.startswith("USE TEMP B-TREE")
+        or step.startswith("SCAN") and " USING " not in step
+        and step != "SCAN CONSTANT ROW"
+    ]
+
+
+class QueryPlanTest(TestCase):
+    """Запросы лент и профиля идут по индексам и не сортируют строки."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.author = User.objects.create(username="author")
+        cls.reader = User.objects.create(username="reader")
+        other = User.objects.create(username="other")
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        for number in range(25):
+            Post.objects.create(
+                text=f"Запись {number}", author=cls.author, group=cls.group
+            )
+            Post.objects.create(text=f"Другая запись {number}", author=other)
+        cls.post = Post.objects.filter(author=cls.author).latest("pk")
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text="Комментарий"
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=other)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(QueryPlanTest.reader)
+
+    def feed_urls(self):
+        author, group = QueryPlanTest.author, QueryPlanTest.group
+        after = f"?{AFTER_PARAM}={encode_cursor(QueryPlanTest.post)}"
+        urls = []
+        for url in (
+            reverse("index"),
+            reverse("group_posts", args=[group.slug]),
+            reverse("profile", args=[author.username]),
+            reverse("follow_index"),
+        ):
+            urls += [url, url + after, f"{url}?{PAGE_PARAM}=2"]
+        urls.append(
+            reverse("post", args=[author.username, QueryPlanTest.post.pk])
+        )
+        return urls
+
+    def assert_plans(self):
+        for url in self.feed_urls():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            for query in queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                plan = explain(query["sql"])
+                with self.subTest(url=url, sql=query["sql"], plan=plan):
+                    self.assertEqual(plan_problems(plan), [])
+
+    def test_feed_and_profile_queries_use_indexes(self):
+        """Ни полного прохода таблицы, ни временного B-дерева."""
+        self.assert_plans()
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_pulled_timeline_queries_use_indexes(self):
+        """Записи популярных авторов подмешиваются тоже по индексу."""
+        self.assert_plans()
@@ -0,0 +1,122 @@
+import io
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.shortcuts import reverse
+from django.test import Client, SimpleTestCase, override_settings
+from PIL import Image
+
+from posts import resize
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_RESIZE_CACHE_DIR=CACHE_DIR,
+    IMAGE_RESIZE_WIDTHS=(100, 320),
+    IMAGE_FORMAT="WEBP",
+)
+class ResizedImageTest(SimpleTestCase):
+    """Уменьшенные варианты картинок отдаются и кэшируются на диске."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        output = io.BytesIO()
+        Image.new("RGB", (400, 200), (30, 200, 30)).save(output, "JPEG")
+        self.name = default_storage.save(
+            "posts/photo.jpg", ContentFile(output.getvalue())
+        )
+
+    def tearDown(self):
+        default_storage.delete(self.name)
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def url(self, width=100, name=None):
+        return reverse("resized_image", args=[width, name or self.name])
+
+    def test_variant_is_resized_and_cached_forever(self):
+        """Вариант уменьшен и снабжен заголовками вечного кэширования."""
+        response = self.client.get(self.url())
+
+        self.assertEqual(response.status_code, 200)
+        image = Image.open(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(image.format, "WEBP")
+        self.assertEqual(image.size, (100, 50))
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+        response = self.client.get(
+            self.url(), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        """Поддерживаются запросы части файла."""
+        response = self.client.get(self.url(), HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(len(b"".join(response.streaming_content)), 10)
+        self.assertTrue(response["Content-Range"].startswith("bytes 0-9/"))
+
+        response = self.client.get(self.url(), HTTP_RANGE="bytes=99999-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_only_allowed_variants(self):
+        """Ширины вне списка и чужие файлы не отдаются."""
+        urls = (
+            self.url(width=101),
+            self.url(name="../settings.py"),
+            self.url(name="other/photo.jpg"),
+            self.url(name="posts/missing.jpg"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_originals_are_not_served(self):
+        """Исходники картинок с метаданными не отдаются."""
+        name = default_storage.save(
+            "posts/originals/photo.jpg", default_storage.open(self.name)
+        )
+        self.addCleanup(default_storage.delete, name)
+
+        for path in (name, name.replace("posts/", "posts/./")):
+            with self.subTest(path=path):
+                response = self.client.get(self.url(name=path))
+                self.assertEqual(response.status_code, 404)
+
+    def test_concurrent_requests_resize_once(self):
+        """Одновременные запросы нового варианта уменьшают картинку раз."""
+        original = resize.resize
+        calls = []
+
+        def slow_resize(source, width):
+            calls.append(width)
+            time.sleep(0.2)
+            return original(source, width)
+
+        with mock.patch("posts.resize.resize", slow_resize):
+            threads = [
+                threading.Thread(
+                    target=resize.get_variant, args=(320, self.name)
+                )
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(calls, [320])
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.shortcuts import reverse
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from posts.models import AuthorStats, Post
+from yatube.db import routers
+
+REPLICA = "replica"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class RouterTest(SimpleTestCase):
+    """Чтение идет на реплику, пока не понадобятся свежие данные."""
+
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        routers.start_request(False)
+
+    def tearDown(self):
+        routers.start_request(False)
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        """Чтение — с реплики, запись — в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), REPLICA)
+        self.assertEqual(self.router.db_for_write(Post), routers.PRIMARY)
+
+    def test_reads_after_write_go_to_primary(self):
+        """После записи чтение в том же запросе идет в основную базу."""
+        self.router.db_for_write(Post)
+        self.assertEqual(self.router.db_for_read(Post), routers.PRIMARY)
+
+    def test_use_primary(self):
+        """Внутри use_primary чтение идет в основную базу."""
+        with routers.use_primary():
+            with routers.use_primary():
+                pass
+            self.assertEqual(self.router.db_for_read(Post), routers.PRIMARY)
+        self.assertEqual(self.router.db_for_read(Post), REPLICA)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Без реплик все идет в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), routers.PRIMARY)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaPinningTest(TestCase):
+    """Автор видит свою запись, даже если реплика отстает."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()  # noqa
+        cls.author = User.objects.create(username="author")
+
+    def setUp(self):
+        # Реплика — отдельный файл SQLite, в который записи не попадают:
+        # так выглядит сильно отставшая реплика.
+        directory = tempfile.mkdtemp()
+        connections.databases[REPLICA] = dict(
+            connections.databases["default"],
+            NAME=os.path.join(directory, "replica.sqlite3"),
+            CONN_MAX_AGE=0,
+        )
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.addCleanup(connections.databases.pop, REPLICA)
+        self.addCleanup(connections.__delitem__, REPLICA)
+        self.addCleanup(connections[REPLICA].close)
+        call_command("migrate", database=REPLICA, verbosity=0)
+        cache.clear()
+
+    def test_author_is_pinned_to_primary_after_write(self):
+        """После записи куки закрепляет автора за основной базой."""
+        author = ReplicaPinningTest.author
+        client = Client()
+        client.force_login(author)
+        profile_url = reverse("profile", args=[author.username])
+
+        response = client.post(reverse("new_post"), {"text": "Свежая"})
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie["max-age"], settings.REPLICA_PIN_SECONDS)
+
+        response = client.get(profile_url)
+        self.assertContains(response, "Свежая")
+
+        # Без куки чтение идет на реплику, где автора еще нет.
+        response = Client().get(profile_url)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_stats_created_on_read_do_not_pin(self):
+        """Статистика, заведенная при чтении, — не запись пользователя."""
+        routers.start_request(False)
+        self.addCleanup(routers.start_request, False)
+
+        AuthorStats.objects.for_user_id(ReplicaPinningTest.author.pk)
+        self.assertFalse(routers.wrote())
+
+        Post.objects.create(text="Запись", author=ReplicaPinningTest.author)
+        self.assertTrue(routers.wrote())
+
+
+class WithoutReplicasTest(TestCase):
+    """Без реплик куки закрепления не ставится."""
+
+    def test_no_pin_cookie(self):
+        """Ни запись, ни заведение статистики при чтении не ставят куки."""
+        User = get_user_model()  # noqa
+        author = User.objects.create(username="author")
+        client = Client()
+        client.force_login(author)
+        cache.clear()
+
+        responses = (
+            Client().get(reverse("profile", args=[author.username])),
+            client.post(reverse("new_post"), {"text": "Запись"}),
+        )
+        for response in responses:
+            with self.subTest(response=response):
+                self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
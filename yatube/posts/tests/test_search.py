@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.test import Client, TestCase
+
+from posts.models import Post
+
+
+class SearchTest(TestCase):
+    """Полнотекстовый поиск по записям работает корректно."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="admin"
+        )
+        cls.cat = Post.objects.create(
+            text="Кот сидит на окне", author=cls.user
+        )
+        cls.cats = Post.objects.create(
+            text="Кот и кот: два кота спят", author=cls.user
+        )
+        cls.dog = Post.objects.create(text="Собака лает", author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse("search"), {"q": query, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [post.pk for post in response.context["page"]]
+
+    def test_results_are_ranked(self):
+        """Найдены подходящие записи, более релевантные — первыми."""
+        self.assertEqual(
+            self.search("кот"), [SearchTest.cats.pk, SearchTest.cat.pk]
+        )
+        self.assertEqual(self.search("СОБАКА"), [SearchTest.dog.pk])
+        self.assertEqual(self.search("соба"), [SearchTest.dog.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении записи."""
+        post = Post.objects.create(text="Попугай", author=SearchTest.user)
+        self.assertEqual(self.search("попугай"), [post.pk])
+
+        post.text = "Хомяк"
+        post.save()
+        self.assertEqual(self.search("попугай"), [])
+        self.assertEqual(self.search("хомяк"), [post.pk])
+
+        post.delete()
+        self.assertEqual(self.search("хомяк"), [])
+
+    def test_syntax_in_query_is_ignored(self):
+        """Спецсимволы FTS5 в запросе не приводят к ошибке."""
+        for query in ('"', "кот OR", "NEAR(", "*", "", "кот -собака"):
+            with self.subTest(query=query):
+                self.search(query)
+
+    def test_pages_keep_query(self):
+        """Ссылки на страницы результатов сохраняют запрос."""
+        Post.objects.bulk_create([
+            Post(text=f"Рыба {i}", author=SearchTest.user) for i in range(15)
+        ])
+        response = self.client.get(reverse("search"), {"q": "рыба"})
+        page = response.context["page"]
+        self.assertTrue(page.has_next())
+        self.assertIn("q=", page.paginator.next_query)
+
+        response = self.client.get(
+            reverse("search") + "?" + page.paginator.next_query
+        )
+        self.assertEqual(len(response.context["page"]), 5)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит записи через индекс."""
+        self.client.force_login(SearchTest.user)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "собака"}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context["cl"].result_list],
+            [SearchTest.dog.pk],
+        )
+
+    def test_rebuild_search_index_command(self):
+        """Команда восстанавливает индекс по таблице записей."""
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("окне"), [SearchTest.cat.pk])
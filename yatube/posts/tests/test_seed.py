@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+
+from posts.models import AuthorStats, Comment, Follow, Post, TimelineEntry
+from posts.search import SearchResults
+
+User = get_user_model()
+
+SIZES = {
+    "users": 40,
+    "groups": 5,
+    "posts": 300,
+    "follows": 200,
+    "comments": 500,
+}
+
+
+@override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=20)
+class SeedDataTest(TestCase):
+    """Команда seed_data заполняет базу согласованными данными."""
+
+    def seed(self, seed=1):
+        call_command("seed_data", seed=seed, stdout=StringIO(), **SIZES)
+
+    def snapshot(self):
+        return list(Post.objects.order_by("pk").values_list(
+            "text", "author_id", "group_id", "comment_count"
+        ))
+
+    def test_counts_and_derived_data(self):
+        """Счетчики, статистика, ленты и поиск сходятся с данными."""
+        self.seed()
+
+        self.assertEqual(User.objects.count(), SIZES["users"])
+        self.assertEqual(Post.objects.count(), SIZES["posts"])
+        self.assertEqual(Comment.objects.count(), SIZES["comments"])
+        self.assertTrue(0 < Follow.objects.count() <= SIZES["follows"])
+
+        wrong_counts = Post.objects.annotate(
+            actual=Count("comments")
+        ).exclude(comment_count=F("actual"))
+        self.assertFalse(wrong_counts.exists())
+        for stats in AuthorStats.objects.all():
+            with self.subTest(user=stats.user_id):
+                self.assertEqual(
+                    AuthorStats.count_for(stats.user_id),
+                    {
+                        "posts_count": stats.posts_count,
+                        "followers_count": stats.followers_count,
+                        "following_count": stats.following_count,
+                    },
+                )
+
+        # Ленты заполнены для подписок на обычных авторов.
+        follow = Follow.objects.filter(
+            author__stats__followers_count__lte=20,
+            author__stats__posts_count__gt=0,
+        ).first()
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user_id=follow.user_id, author_id=follow.author_id
+            ).count(),
+            follow.author.stats.posts_count,
+        )
+
+        # Поисковый индекс перестроен, а триггер снова на месте.
+        word = Post.objects.first().text.split()[0]
+        self.assertGreater(SearchResults(word).count(), 0)
+        post = Post.objects.create(text="уникальнейшее", author=follow.user)
+        self.assertEqual(list(SearchResults("уникальнейшее")[0:1]), [post])
+
+    def test_search_trigger_restored_after_failure(self):
+        """После ошибки вставки новые записи снова попадают в поиск."""
+        user = User.objects.create(username="existing")
+        # Имя совпадет с тем, что команда выберет первому пользователю.
+        user.username = f"user{user.pk + 1}"
+        user.save()
+        with self.assertRaises(IntegrityError):
+            self.seed()
+
+        post = Post.objects.create(text="уникальнейшее", author=user)
+        self.assertEqual(list(SearchResults("уникальнейшее")[0:1]), [post])
+
+    def test_same_seed_same_data(self):
+        """Одинаковый seed дает одинаковые данные, другой — другие."""
+        snapshots = []
+        for seed in (1, 1, 2):
+            with transaction.atomic():
+                self.seed(seed)
+                snapshots.append(self.snapshot())
+                transaction.set_rollback(True)
+
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertNotEqual(snapshots[0], snapshots[2])
+
+    def test_power_law(self):
+        """Немногие авторы собирают большую часть подписчиков."""
+        self.seed()
+        followers = sorted(
+            AuthorStats.objects.values_list("followers_count", flat=True),
+            reverse=True,
+        )
+        top = sum(followers[:len(followers) // 10])
+        self.assertGreater(top, sum(followers) / 3)
@@ -0,0 +1,108 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, SimpleTestCase, override_settings
+
+SOURCE_DIR = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+
+STYLE = b"body { color: #333; }\n" * 100
+SMALL_SCRIPT = b"console.log(1);\n"
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATICFILES_FINDERS=[
+        "django.contrib.staticfiles.finders.FileSystemFinder",
+    ],
+)
+class StaticPipelineTest(SimpleTestCase):
+    """Статика собирается с хэшами, сжимается и кэшируется навсегда."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, "css"))
+        with open(os.path.join(SOURCE_DIR, "css", "site.css"), "wb") as f:
+            f.write(STYLE)
+        with open(os.path.join(SOURCE_DIR, "small.js"), "wb") as f:
+            f.write(SMALL_SCRIPT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def tearDown(self):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        os.makedirs(STATIC_ROOT)
+        staticfiles_storage.hashed_files.clear()
+
+    def collect(self):
+        call_command("collectstatic", interactive=False, stdout=StringIO())
+        return staticfiles_storage.stored_name("css/site.css")
+
+    def static_url(self, name):
+        template = Template("{% load static %}{% static name %}")
+        return template.render(Context({"name": name}))
+
+    def test_uncollected_files_keep_source_names(self):
+        """Без собранной статики шаблоны ссылаются на исходные имена."""
+        self.assertEqual(
+            self.static_url("css/site.css"), "/static/css/site.css"
+        )
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """Сборка кладет файлы с хэшем и gzip-копии сжимаемых файлов."""
+        hashed_name = self.collect()
+
+        self.assertRegex(hashed_name, r"^css/site\.[0-9a-f]{12}\.css$")
+        self.assertEqual(
+            self.static_url("css/site.css"), "/static/" + hashed_name
+        )
+        with gzip.open(staticfiles_storage.path(hashed_name + ".gz")) as f:
+            self.assertEqual(f.read(), STYLE)
+        self.assertFalse(staticfiles_storage.exists("small.js.gz"))
+
+    def test_serving_picks_compressed_copy(self):
+        """Сжатая копия отдается только клиентам, принимающим gzip."""
+        url = "/static/" + self.collect()
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+        body = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), STYLE)
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(b"".join(response.streaming_content), STYLE)
+
+    def test_unhashed_names_are_not_immutable(self):
+        """Исходные имена кэшируются недолго, чужие пути не отдаются."""
+        self.collect()
+
+        response = self.client.get("/static/small.js")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertFalse(response.has_header("Vary"))
+
+        for url in ("/static/missing.css", "/static/../manage.py"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
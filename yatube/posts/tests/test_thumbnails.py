@@ -0,0 +1,146 @@
+import shutil
+import tempfile
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.shortcuts import reverse
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+
+from posts import thumbnails
+from posts.models import Post
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+def uploaded_gif(name="small.gif"):
+    return SimpleUploadedFile(
+        name=name, content=SMALL_GIF, content_type="image/gif"
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailLookupTest(TestCase):
+    """Шаблоны показывают только готовые миниатюры."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.user = User.objects.create(username="test_user")
+        cls.post = Post.objects.create(
+            text="Запись с картинкой", author=cls.user, image=uploaded_gif()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_page_shows_source_until_thumbnail_is_built(self):
+        """До построения миниатюры выводится исходная картинка."""
+        post = ThumbnailLookupTest.post
+        self.assertIsNone(thumbnails.lookup(post.image, "card"))
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, f'src="{post.image.url}"')
+
+        thumbnails.build_for_post(post.pk)
+
+        thumbnail = thumbnails.lookup(post.image, "card")
+        self.assertIsNotNone(thumbnail)
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, f'src="{thumbnail.url}"')
+
+    def test_image_size_is_reserved(self):
+        """Картинка выводится с размерами, заглушкой и ленивой загрузкой."""
+        post = ThumbnailLookupTest.post
+        # Закэшированная карточка тоже должна обновиться.
+        self.client.get(reverse("index"))
+        call_command("backfill_image_info", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertTrue(post.image_placeholder)
+
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, 'width="2" height="1"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, post.image_placeholder)
+
+        thumbnails.build_for_post(post.pk)
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, 'width="960"')
+
+    def test_broken_image_is_logged(self):
+        """Ошибка построения не выходит за пределы задачи."""
+        post = Post.objects.create(
+            text="Битая картинка",
+            author=ThumbnailLookupTest.user,
+            image=SimpleUploadedFile("broken.gif", b"not an image"),
+        )
+        with self.assertLogs("sorl.thumbnail", level="ERROR"):
+            with self.assertLogs("posts.thumbnails", level="ERROR"):
+                thumbnails.build_for_post(post.pk)
+
+    def test_backfill_thumbnails_command(self):
+        """Команда строит недостающие миниатюры и сообщает об ошибках."""
+        broken = Post.objects.create(
+            text="Битая картинка",
+            author=ThumbnailLookupTest.user,
+            image=SimpleUploadedFile("broken.gif", b"not an image"),
+        )
+        stdout, stderr = StringIO(), StringIO()
+        with self.assertLogs("sorl.thumbnail", level="ERROR"):
+            call_command(
+                "backfill_thumbnails",
+                workers=0,
+                stdout=stdout,
+                stderr=stderr,
+            )
+
+        post = ThumbnailLookupTest.post
+        self.assertIsNotNone(thumbnails.lookup(post.image, "card"))
+        self.assertIn(f"Запись {broken.pk}", stderr.getvalue())
+        self.assertIn("Записей: 2", stdout.getvalue())
+
+        stdout = StringIO()
+        call_command(
+            "backfill_thumbnails", workers=0, after_id=broken.pk, stdout=stdout
+        )
+        self.assertIn("Записей: 0", stdout.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailScheduleTest(TransactionTestCase):
+    """Миниатюры строятся после сохранения картинки."""
+
+    def test_new_post_builds_thumbnails(self):
+        User = get_user_model()  # noqa
+        user = User.objects.create(username="author")
+        client = Client()
+        client.force_login(user)
+
+        client.post(
+            reverse("new_post"),
+            {"text": "Новая запись", "image": uploaded_gif("new.gif")},
+        )
+
+        post = Post.objects.get(text="Новая запись")
+        self.assertIsNotNone(thumbnails.lookup(post.image, "card"))
@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.test import Client, TestCase, override_settings
+
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+
+
+class TimelineTest(TestCase):
+    """Материализованная лента подписок работает корректно."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()  # noqa
+        cls.reader = User.objects.create(username="reader")
+        cls.author = User.objects.create(username="author")
+        cls.star = User.objects.create(username="star")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(TimelineTest.reader)
+
+    def feed_texts(self):
+        response = self.client.get(reverse("follow_index"))
+        return [post.text for post in response.context["page"]]
+
+    def test_new_post_is_fanned_out(self):
+        """Новая запись автора попадает в ленту подписчика."""
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author
+        )
+        post = Post.objects.create(text="Новая", author=TimelineTest.author)
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTest.reader, post=post
+            ).exists()
+        )
+        self.assertEqual(self.feed_texts(), ["Новая"])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка добавляет старые записи, отписка их убирает."""
+        Post.objects.create(text="Старая", author=TimelineTest.author)
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author
+        )
+        self.assertEqual(self.feed_texts(), ["Старая"])
+
+        Follow.objects.filter(
+            user=TimelineTest.reader, author=TimelineTest.author
+        ).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTest.reader).exists()
+        )
+        self.assertEqual(self.feed_texts(), [])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_celebrity_posts_are_pulled(self):
+        """Записи популярного автора не раскладываются, а подмешиваются."""
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.star
+        )
+        Post.objects.create(text="От звезды", author=TimelineTest.star)
+
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTest.reader).exists()
+        )
+        self.assertEqual(self.feed_texts(), ["От звезды"])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+    def test_author_back_under_limit_stays_pulled(self):
+        """Записи, опубликованные за порогом, не пропадают из ленты."""
+        star = TimelineTest.star
+        Follow.objects.create(user=TimelineTest.reader, author=star)
+        Follow.objects.create(user=TimelineTest.author, author=star)
+        Post.objects.create(text="От звезды", author=star)
+        self.assertEqual(self.feed_texts(), ["От звезды"])
+
+        # Отписка ничего не раскладывает: записи по-прежнему подмешиваются.
+        Follow.objects.filter(user=TimelineTest.author, author=star).delete()
+        self.assertFalse(TimelineEntry.objects.filter(author=star).exists())
+        self.assertEqual(self.feed_texts(), ["От звезды"])
+
+        call_command("rebuild_timelines", pulled=True, stdout=StringIO())
+
+        self.assertFalse(AuthorStats.objects.get(user=star).pulled)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTest.reader, author=star
+            ).exists()
+        )
+        self.assertEqual(self.feed_texts(), ["От звезды"])
+
+    def test_rebuild_timelines_command(self):
+        """Команда восстанавливает ленты по существующим подпискам."""
+        Follow.objects.create(
+            user=TimelineTest.reader, author=TimelineTest.author
+        )
+        Post.objects.create(text="Запись", author=TimelineTest.author)
+        TimelineEntry.objects.all().delete()
+
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertEqual(self.feed_texts(), ["Запись"])
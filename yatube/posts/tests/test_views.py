@@ -4,11 +4,14 @@ import tempfile
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.shortcuts import reverse
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from posts.models import Group, Post, Follow
+from posts.models import Comment, Group, Post, Follow
 
 MEDIA_ROOT = tempfile.mkdtemp()
 
@@ -325,24 +328,118 @@ class CacheTest(TestCase):
     def test_cashe_index(self):
         """Кэширование главной страницы."""
         url = reverse("index")
-        response = self.client.get(url)
-
-        posts_count_old = len(response.context["page"])
-
-        Post.objects.create(
+        post = Post.objects.create(
             text="Проверка кэширования",
             author=CacheTest.user
         )
+        response = self.client.get(url)
+        self.assertEqual(response.context["page"][0].text, post.text)
 
+        # Правка в обход сигналов не видна: страница взята из кэша.
+        Post.objects.filter(pk=post.pk).update(text="Тихая правка")
         response = self.client.get(url)
-        self.assertEqual(len(response.context["page"]), posts_count_old)
+        self.assertEqual(response.context["page"][0].text, post.text)
 
         cache.clear()
         response = self.client.get(url)
-        self.assertEqual(
-            len(response.context["page"].object_list),
-            posts_count_old + 1
+        self.assertEqual(response.context["page"][0].text, "Тихая правка")
+
+    def test_cache_invalidated_by_writes(self):
+        """Новые записи и комментарии сразу сбрасывают кэш лент."""
+        group = Group.objects.create(
+            title="Группа", slug="cache_group", description="Описание"
+        )
+        urls = [
+            reverse("index"),
+            reverse("group_posts", kwargs={"slug": group.slug}),
+            reverse("profile", kwargs={"username": CacheTest.user.username}),
+        ]
+        for url in urls:
+            self.client.get(url)
+
+        post = Post.objects.create(
+            text="Новая запись", author=CacheTest.user, group=group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.context["page"][0], post)
+
+        Comment.objects.create(
+            post=post, author=CacheTest.user, text="Комментарий"
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context["page"][0].comment_count, 1
+                )
+
+    def test_post_edit_keeps_cached_page(self):
+        """Правка записи не выбрасывает закэшированный список ленты."""
+        post = Post.objects.create(text="До правки", author=CacheTest.user)
+        url = reverse("index")
+        self.client.get(url)
+
+        self.client.post(
+            reverse(
+                "post_edit",
+                kwargs={
+                    "username": CacheTest.user.username,
+                    "post_id": post.pk,
+                },
+            ),
+            data={"text": "После правки"},
         )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.context["page"][0].text, "После правки")
+        self.assertFalse(
+            any("ORDER BY" in query["sql"] for query in queries),
+            "Список записей ленты не должен пересчитываться",
+        )
+
+    def test_post_card_shared_between_viewers(self):
+        """Карточка записи общая, кнопка правки — только у автора."""
+        post = Post.objects.create(
+            text="Общая карточка", author=CacheTest.user
+        )
+        edit_url = reverse(
+            "post_edit",
+            kwargs={"username": CacheTest.user.username, "post_id": post.pk},
+        )
+        fragment_key = make_template_fragment_key(
+            "post_item",
+            [
+                post.pk,
+                post.updated.timestamp(),
+                post.comment_count,
+                CacheTest.user.username,
+                "",
+            ],
+        )
+
+        response = Client().get(reverse("index"))
+        self.assertNotContains(response, edit_url)
+        self.assertIsNotNone(cache.get(fragment_key))
+
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, edit_url)
+        self.assertContains(response, "Общая карточка", count=1)
+
+    def test_follow_feed_invalidated_by_follow(self):
+        """Подписка и новые записи автора сразу видны в ленте."""
+        author = get_user_model().objects.create(username="cache_author")
+        Post.objects.create(text="Старая запись", author=author)
+        url = reverse("follow_index")
+        self.assertEqual(len(self.client.get(url).context["page"]), 0)
+
+        Follow.objects.create(user=CacheTest.user, author=author)
+        self.assertEqual(len(self.client.get(url).context["page"]), 1)
+
+        Post.objects.create(text="Новая запись", author=author)
+        self.assertEqual(len(self.client.get(url).context["page"]), 2)
 
 
 class PaginatorViewsTest(TestCase):
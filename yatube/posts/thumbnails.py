@@ -0,0 +1,134 @@
+"""Миниатюры картинок записей, построенные заранее.
+
+Размеры миниатюр заданы заготовками в settings.POST_THUMBNAILS. После
+сохранения картинки в new_post или post_edit все заготовки строятся в
+пуле потоков, а шаблоны только ищут готовые миниатюры (тег
+ready_thumbnail) и никогда не строят их во время запроса.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from sorl.thumbnail import base, default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import caching
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+class ThumbnailBackend(base.ThumbnailBackend):
+    """Бэкенд sorl, который умеет искать миниатюру, не строя ее."""
+
+    def get_options(self, source, options):
+        """Опции миниатюры, дополненные так же, как в get_thumbnail."""
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Миниатюра из хранилища ключей sorl или None."""
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.get_options(source, options)
+        )
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def lookup(image, preset):
+    """Готовая миниатюра заготовки preset или None."""
+    geometry, options = settings.POST_THUMBNAILS[preset]
+    return default.backend.get_ready_thumbnail(image, geometry, **options)
+
+
+def build(image):
+    """Строит все заготовки для картинки; возвращает их число."""
+    for geometry, options in settings.POST_THUMBNAILS.values():
+        thumbnail = default.backend.get_thumbnail(image, geometry, **options)
+        # Нечитаемый исходник sorl только логирует и отдает пустую ссылку.
+        if not thumbnail.exists():
+            raise OSError(f"Миниатюра {geometry} для {image} не построена")
+    return len(settings.POST_THUMBNAILS)
+
+
+def build_quietly(item):
+    """Строит миниатюры пары (id записи, картинка) в процессе пула.
+
+    Возвращает (id, число миниатюр, текст ошибки или None): исключения
+    не должны обрывать обход всей таблицы.
+    """
+    post_id, image = item
+    try:
+        return post_id, build(image), None
+    except Exception as error:
+        return post_id, 0, str(error) or error.__class__.__name__
+
+
+def build_for_post(post_id):
+    """Строит миниатюры записи и обновляет ее карточку.
+
+    Карточка кэшируется по дате изменения, поэтому после построения дата
+    сдвигается, и в ленте вместо исходной картинки появится миниатюра.
+    """
+    image = Post.objects.filter(pk=post_id).values_list(
+        "image", flat=True
+    ).first()
+    if not image:
+        return
+    try:
+        build(image)
+    except Exception:
+        logger.exception("Не удалось построить миниатюры записи %s", post_id)
+        return
+    Post.objects.filter(pk=post_id, image=image).update(
+        updated=timezone.now()
+    )
+    caching.forget_post(post_id)
+
+
+def _run_in_worker(post_id):
+    try:
+        build_for_post(post_id)
+    finally:
+        # У каждого потока пула свое соединение с базой.
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix="thumbnails",
+        )
+    return _executor
+
+
+def _submit(post_id):
+    _get_executor().submit(_run_in_worker, post_id)
+
+
+def schedule(post):
+    """Ставит построение миниатюр записи в очередь после коммита.
+
+    При THUMBNAIL_WORKERS = 0 миниатюры строятся сразу, в том же потоке.
+    """
+    if not post.image:
+        return
+    run = _submit if settings.THUMBNAIL_WORKERS else build_for_post
+    transaction.on_commit(partial(run, post.pk))
@@ -0,0 +1,162 @@
+"""Материализованная лента подписок (fan-out on write).
+
+При публикации запись раскладывается по лентам подписчиков автора, при
+подписке в ленту добавляются последние записи автора, при отписке они
+удаляются. Авторы с огромной аудиторией в ленты не раскладываются: их
+записи подмешиваются при чтении ленты (pull).
+
+Записи, разложенные до того, как автор стал популярным, остаются в
+лентах; дубли при слиянии отбрасываются. Обратно сложнее: если запись
+или подписка хоть раз не разложилась, автор помечается pulled, и его
+записи подмешиваются при чтении, даже когда он опустится под порог.
+Пометку снимает rebuild_timelines, разложив записи таких авторов
+пачками, — не отписка, иначе она раскладывала бы тысячи записей по
+тысячам лент прямо в запросе.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .paginators import KeysetPaginator, keyset_filter
+
+
+def pulled_filter():
+    """Условие на AuthorStats: записи автора подмешиваются при чтении."""
+    return Q(pulled=True) | Q(
+        followers_count__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    )
+
+
+def is_celebrity(author_id):
+    """Записи автора подтягиваются при чтении, а не раскладываются."""
+    stats = AuthorStats.objects.for_user_id(author_id)
+    return stats.followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def is_pulled(author_id):
+    """Записи автора подмешиваются при чтении; статистику не заводит.
+
+    Годится и при каскадном удалении пользователя: новая строка сослалась
+    бы на удаляемую запись.
+    """
+    return AuthorStats.objects.filter(
+        pulled_filter(), user_id=author_id
+    ).exists()
+
+
+def followed_celebrity_ids(user):
+    """Авторы, чьи записи подмешиваются в ленту пользователя.
+
+    Статистика есть у каждого автора, чьи записи не раскладывались:
+    ее заводит is_celebrity при публикации.
+    """
+    return set(AuthorStats.objects.filter(
+        pulled_filter(), user__following__user=user
+    ).values_list("user_id", flat=True))
+
+
+def skips_fan_out(author_id):
+    """Записи автора не раскладываются; такой автор помечается pulled."""
+    if not is_celebrity(author_id):
+        return False
+    AuthorStats.objects.filter(
+        user_id=author_id, pulled=False
+    ).update(pulled=True)
+    return True
+
+
+def fan_out_post(post):
+    """Раскладывает новую запись по лентам подписчиков автора."""
+    if skips_fan_out(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True).iterator()
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние записи автора после подписки."""
+    if skips_fan_out(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-id"
+    ).values_list("id", "pub_date")[:settings.TIMELINE_BACKFILL_SIZE]
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts
+    )
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты записи автора после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+class TimelinePaginator(KeysetPaginator):
+    """Пажинатор ленты подписок.
+
+    Сливает материализованную ленту пользователя с записями «знаменитых»
+    авторов, на которых он подписан; object_list задает только выборку,
+    которой загружаются сами записи.
+    """
+
+    def __init__(self, user, object_list, per_page, query_params=None):
+        super().__init__(object_list, per_page, query_params)
+        self.user = user
+        self.pulled_author_ids = followed_celebrity_ids(user)
+
+    @property
+    def count(self):
+        entries = TimelineEntry.objects.filter(user=self.user).count()
+        return entries + self._pulled_posts().count()
+
+    def _pulled_posts(self):
+        return Post.objects.filter(author_id__in=self.pulled_author_ids)
+
+    def fetch(self, cursor=None, newer=False, offset=0, limit=None):
+        entries = TimelineEntry.objects.filter(user=self.user)
+        if cursor is not None:
+            entries = entries.filter(
+                keyset_filter(cursor, newer, "pub_date", "post_id")
+            )
+
+        prefix = "" if newer else "-"
+        keys = set(entries.order_by(
+            f"{prefix}pub_date", f"{prefix}post_id"
+        ).values_list("pub_date", "post_id")[:offset + limit])
+        # Каждый автор — отдельным запросом по индексу ленты автора:
+        # выборку по нескольким авторам сразу (IN) SQLite сортировал бы
+        # во временном B-дереве.
+        for author_id in sorted(self.pulled_author_ids):
+            pulled = Post.objects.filter(author_id=author_id)
+            if cursor is not None:
+                pulled = pulled.filter(keyset_filter(cursor, newer))
+            keys.update(pulled.order_by(
+                f"{prefix}pub_date", f"{prefix}id"
+            ).values_list("pub_date", "id")[:offset + limit])
+
+        keys = sorted(keys, reverse=not newer)[offset:offset + limit]
+        posts = self.object_list.in_bulk([pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
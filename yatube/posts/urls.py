@@ -6,6 +6,12 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("new/", views.new_post, name="new_post"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search, name="search"),
+    path(
+        "media/resize/<int:width>/<path:name>",
+        views.resized_image,
+        name="resized_image",
+    ),
     path("group/<str:slug>/", views.group_posts, name="group_posts"),
     path("<str:username>/", views.profile, name="profile"),
     path(
@@ -1,46 +1,52 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import (
     require_http_methods,
     require_GET,
     require_POST,
+    require_safe,
 )
 from django.core.exceptions import PermissionDenied
+from PIL import Image
 
+from yatube.files import FOREVER, file_response
 
+
+from . import caching, conditional, resize, thumbnails
 from .forms import CommentForm, PostForm
-from .models import Group, Post, Follow
+from .models import AuthorStats, Group, Post, Follow
+from .paginators import KeysetPaginator
+from .search import QUERY_PARAM, SearchPaginator, SearchResults
+from .timeline import TimelinePaginator
 
 User = get_user_model()
 
+POSTS_PER_PAGE = 10
+
 
 @require_GET
 def index(request):
     """Основная страница со всеми постами."""
-    page_number = request.GET.get("page")
-    key = f"index-page-cache-{page_number}"
-    page = cache.get(key=key)
-
-    if page is None:
-        posts = Post.objects.all()
-        paginator = Paginator(posts, 10)
-        page = paginator.get_page(page_number)
+    validators = conditional.get_validators(
+        request, [caching.INDEX_FEED, caching.POST_CARDS]
+    )
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
 
-        cache.set(
-            key=key,
-            value=page,
-            timeout=20
-        )
+    paginator = KeysetPaginator(Post.objects.for_feed(), POSTS_PER_PAGE)
+    page = caching.get_feed_page(request, paginator, [caching.INDEX_FEED])
 
-    return render(
+    return conditional.render(
         request,
         "posts/index.html",
         {
             "page": page,
         },
+        validators,
     )
 
 
@@ -58,6 +64,7 @@ def new_post(request):
         obj = form.save(commit=False)
         obj.author = request.user
         obj.save()
+        thumbnails.schedule(obj)
 
         return redirect("index")
 
@@ -71,19 +78,38 @@ def group_posts(request, slug):
     """Посты определнной группы."""
 
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    validators = conditional.get_validators(
+        request, [caching.group_feed(group.pk), caching.POST_CARDS]
+    )
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
+
+    posts = group.posts.for_feed()
+    paginator = KeysetPaginator(posts, POSTS_PER_PAGE)
+    page = caching.get_feed_page(
+        request, paginator, [caching.group_feed(group.pk)]
+    )
 
-    return render(request, "posts/group.html", {"group": group, "page": page})
+    return conditional.render(
+        request, "posts/group.html", {"group": group, "page": page}, validators
+    )
 
 
 @require_GET
 def profile(request, username):
     """Профиль пользователя."""
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    validators = conditional.get_validators(request, [
+        caching.profile_feed(author.pk),
+        caching.stats_feed(author.pk),
+        caching.POST_CARDS,
+    ])
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
+
+    posts = author.posts.for_feed()
 
     following = False
     if request.user.is_authenticated:
@@ -92,17 +118,21 @@ def profile(request, username):
             author=author
         ).exists()
 
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    paginator = KeysetPaginator(posts, POSTS_PER_PAGE)
+    page = caching.get_feed_page(
+        request, paginator, [caching.profile_feed(author.pk)]
+    )
 
     context = {
         "author": author,
+        "stats": AuthorStats.objects.for_user_id(author.pk),
         "page": page,
         "following": following,
     }
 
-    return render(request, "posts/profile.html", context)
+    return conditional.render(
+        request, "posts/profile.html", context, validators
+    )
 
 
 @require_http_methods(["GET", "POST"])
@@ -110,19 +140,31 @@ def post_view(request, username, post_id):
     """Страница одной конкретной записи."""
 
     author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, pk=post_id, author=author)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.for_feed(), pk=post_id, author=author
+    )
+    validators = conditional.get_validators(request, [
+        caching.post_page(post.pk),
+        caching.profile_feed(author.pk),
+        caching.stats_feed(author.pk),
+    ])
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
+
+    comments = post.comments.select_related("author")
 
     form = CommentForm()
 
     context = {
         "author": author,
+        "stats": AuthorStats.objects.for_user_id(author.pk),
         "post": post,
         "comments": comments,
         "form": form,
     }
 
-    return render(request, "posts/post.html", context)
+    return conditional.render(request, "posts/post.html", context, validators)
 
 
 @require_POST
@@ -140,7 +182,9 @@ def add_comment(request, username, post_id):
         obj = form.save(commit=False)
         obj.post = post
         obj.author = request.user
-        obj.save()
+        # Комментарий и счетчик записи сохраняются вместе.
+        with transaction.atomic():
+            obj.save()
 
     return redirect("post", username=username, post_id=post_id)
 
@@ -163,6 +207,8 @@ def post_edit(request, username, post_id):
 
     if form.is_valid():
         form.save()
+        if "image" in form.changed_data:
+            thumbnails.schedule(post)
 
         return redirect("post", username=username, post_id=post_id)
 
@@ -182,15 +228,44 @@ def post_edit(request, username, post_id):
 @login_required(redirect_field_name="login")
 def follow_index(request):
     """Лента подписок."""
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    paginator = TimelinePaginator(
+        request.user, Post.objects.for_feed(), POSTS_PER_PAGE
+    )
+    # Записи популярных авторов подмешиваются при чтении, поэтому лента
+    # зависит и от версий их профилей.
+    feeds = [caching.follow_feed(request.user.pk)]
+    feeds.extend(
+        caching.profile_feed(author_id)
+        for author_id in sorted(paginator.pulled_author_ids)
+    )
+    validators = conditional.get_validators(
+        request, [*feeds, caching.POST_CARDS]
+    )
+    response = conditional.not_modified(request, validators)
+    if response is not None:
+        return response
 
-    return render(
+    page = caching.get_feed_page(request, paginator, feeds)
+
+    return conditional.render(
         request,
         "posts/follow.html",
-        {"page": page}
+        {"page": page},
+        validators,
+    )
+
+
+@require_GET
+def search(request):
+    """Поиск по тексту записей, самые подходящие — первыми."""
+    query = request.GET.get(QUERY_PARAM, "").strip()
+    paginator = SearchPaginator(
+        SearchResults(query), POSTS_PER_PAGE, request.GET
+    )
+    page = paginator.get_page(request.GET.get("page"))
+
+    return render(
+        request, "posts/search.html", {"query": query, "page": page}
     )
 
 
@@ -223,3 +298,18 @@ def profile_unfollow(request, username):
     ).delete()
 
     return redirect("profile", username=username)
+
+
+@require_safe
+def resized_image(request, width, name):
+    """Картинка записи, уменьшенная до ширины из разрешенного списка."""
+    if not resize.is_allowed(width, name):
+        raise Http404("Такой вариант картинки не предусмотрен.")
+    try:
+        path, key = resize.get_variant(width, name)
+    except (OSError, Image.DecompressionBombError):
+        raise Http404("Картинка не найдена.")
+
+    return file_response(
+        request, path, etag=key, max_age=FOREVER, immutable=True
+    )
@@ -0,0 +1,111 @@
+"""Чтение с реплик, запись в основную базу.
+
+Запросы на чтение уходят на случайную реплику из
+settings.DATABASE_REPLICAS, запись — в основную базу. Реплики отстают от
+основной базы, поэтому чтение тоже идет в основную базу:
+
+- в запросах, которые меняют данные (POST и другие небезопасные методы),
+  и после первой записи в потоке — свои изменения видны сразу;
+- в течение settings.REPLICA_PIN_SECONDS после записи: middleware
+  PrimaryPinningMiddleware ставит пользователю куки, и автор видит свою
+  запись на следующих страницах;
+- внутри use_primary(): так читается все, что попадает в кэш, — иначе
+  отставшая реплика положила бы в кэш старые данные под новой версией.
+
+Без реплик записи не отслеживаются и куки не ставится. Запись, которую
+делает чтение (например, первое заведение статистики автора), оборачивается
+в derived_write() и тоже не закрепляет пользователя за основной базой.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+PRIMARY = "default"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = threading.local()
+
+
+def start_request(pinned):
+    """Начало запроса: чтение с основной базы, если pinned."""
+    _state.primary = 1 if pinned else 0
+    _state.wrote = False
+
+
+def wrote():
+    """Были ли записи в основную базу с начала запроса."""
+    return getattr(_state, "wrote", False)
+
+
+def reads_from_primary():
+    return getattr(_state, "primary", 0) > 0 or wrote()
+
+
+@contextmanager
+def derived_write():
+    """Блок, записи в котором не считаются записями пользователя."""
+    wrote_before = wrote()
+    try:
+        yield
+    finally:
+        _state.wrote = wrote_before
+
+
+@contextmanager
+def use_primary():
+    """Блок, в котором все чтение идет в основную базу."""
+    depth = getattr(_state, "primary", 0)
+    _state.primary = depth + 1
+    try:
+        yield
+    finally:
+        _state.primary = depth
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or reads_from_primary():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if settings.DATABASE_REPLICAS:
+            _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class PrimaryPinningMiddleware(MiddlewareMixin):
+    """Чтение с основной базы после записи пользователя.
+
+    Стоит перед SessionMiddleware: сохранение сессии — тоже запись.
+    """
+
+    def process_request(self, request):
+        start_request(
+            request.method not in SAFE_METHODS
+            or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+
+    def process_response(self, request, response):
+        if wrote():
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        start_request(False)
+        return response
@@ -0,0 +1,41 @@
+"""SQLite для нескольких процессов сервера.
+
+Каждое соединение включает WAL и прочие настройки из
+settings.SQLITE_PRAGMAS: в WAL читатели не ждут писателя, а писатель не
+ждет читателей.
+
+«database is locked» при одновременных записях возникает не из-за
+коротких блокировок — их пережидает busy_timeout, — а из-за отложенных
+транзакций Django: транзакция начинается как читающая и пытается стать
+пишущей, когда другая уже пишет. Такую транзакцию SQLite сразу
+прерывает, не дожидаясь busy_timeout. Поэтому блоки atomic начинаются с
+BEGIN IMMEDIATE: блокировка на запись берется в начале блока, а
+конкуренты ждут ее в очереди.
+
+Перед закрытием соединение выполняет PRAGMA optimize, как советует
+документация SQLite; долгоживущие соединения (CONN_MAX_AGE) так
+обслуживаются при каждом переоткрытии, а полный ANALYZE запускается
+командой optimize_database по расписанию.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
+
+    def _close(self):
+        if self.connection is not None:
+            try:
+                self.connection.execute("PRAGMA optimize")
+            except base.Database.Error:
+                pass
+        super()._close()
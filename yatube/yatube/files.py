@@ -0,0 +1,152 @@
+"""Отдача файлов с диска: условные запросы, Range и блокировки.
+
+Общие помощники для представлений, которые отдают картинки и другие
+файлы сами, а не через веб-сервер.
+"""
+import fcntl
+import mimetypes
+import os
+import re
+from contextlib import contextmanager
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+# Год — «навсегда» для адресов, содержимое которых никогда не меняется.
+FOREVER = 60 * 60 * 24 * 365
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Клиент принимает gzip (заголовок Accept-Encoding).
+ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
+
+
+def parse_range(header, size):
+    """Границы (start, end) единственного диапазона байтов.
+
+    None — заголовка нет или он не поддерживается (отдаем файл целиком),
+    False — диапазон за пределами файла (ответ 416).
+    """
+    match = _RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # bytes=-N: последние N байтов.
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def file_response(request, path, etag=None, max_age=None, immutable=False,
+                  content_type=None):
+    """Ответ с файлом path: 304, 206, 416 или 200.
+
+    ETag по умолчанию строится из размера и времени изменения файла.
+    """
+    stat = os.stat(path)
+    if etag is None:
+        etag = f"{stat.st_size:x}-{int(stat.st_mtime * 1000):x}"
+    etag = quote_etag(etag)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = _file_body(request, path, stat.st_size, etag, content_type)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    if max_age is not None:
+        patch_cache_control(response, public=True, max_age=max_age)
+        if immutable:
+            patch_cache_control(response, immutable=True)
+    return response
+
+
+def _file_body(request, path, size, etag, content_type):
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0]
+    content_type = content_type or "application/octet-stream"
+
+    byte_range = None
+    # If-Range: диапазон отдается, только если файл не изменился.
+    if request.META.get("HTTP_IF_RANGE", etag) == etag:
+        byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    if byte_range is None:
+        # Без диапазона FileResponse отдается через wsgi.file_wrapper, то
+        # есть sendfile там, где сервер его поддерживает.
+        return FileResponse(open(path, "rb"), content_type=content_type)
+
+    start, end = byte_range
+    response = FileResponse(
+        FileRange(open(path, "rb"), start, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+class FileRange:
+    """Часть открытого файла для FileResponse.
+
+    read не выходит за границы диапазона, а fileno и tell отдаются как
+    есть: серверы с sendfile (gunicorn) передают диапазон без копирования
+    через Python, начиная с текущей позиции и не дальше Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+@contextmanager
+def file_lock(path):
+    """Межпроцессная блокировка на файле path.lock.
+
+    flock действует на открытый файл, поэтому исключает и потоки одного
+    процесса, и разные процессы сервера.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_atomic(path, data):
+    """Пишет файл целиком или не пишет вовсе: читатели не видят половину."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
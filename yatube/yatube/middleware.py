@@ -0,0 +1,108 @@
+"""Сжатие ответов приложения.
+
+Сжимаются HTML и JSON (settings.COMPRESS_CONTENT_TYPES) крупнее
+settings.COMPRESS_MIN_SIZE с уровнем settings.COMPRESS_LEVEL. Потоковые
+ответы сжимаются по частям: каждая часть уходит клиенту сразу, не
+дожидаясь конца ответа.
+
+BREACH: по длине сжатого ответа можно подбирать секрет, если в той же
+странице отражается ввод атакующего. Django и так маскирует токен CSRF
+заново в каждом ответе, а в ответы с токеном добавляется еще и случайное
+число байтов в заголовке gzip, чтобы длина не выдавала совпадений.
+"""
+import gzip
+import io
+import secrets
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .files import ACCEPTS_GZIP_RE
+
+
+def _gzip_file(buffer, level, padding):
+    # Случайное имя файла в заголовке gzip меняет длину ответа, не трогая
+    # сжимаемое содержимое.
+    return gzip.GzipFile(
+        filename=secrets.token_hex(padding)[:padding] if padding else "",
+        mode="wb",
+        compresslevel=level,
+        fileobj=buffer,
+        mtime=0,
+    )
+
+
+def random_padding():
+    """Случайная длина добавки от 1 до COMPRESS_MAX_PADDING байтов."""
+    return secrets.randbelow(settings.COMPRESS_MAX_PADDING) + 1
+
+
+def compress(data, level, padding=0):
+    """Байты data в gzip."""
+    buffer = io.BytesIO()
+    with _gzip_file(buffer, level, padding) as file:
+        file.write(data)
+    return buffer.getvalue()
+
+
+def compress_sequence(chunks, level, padding=0):
+    """Сжатые части потокового ответа; каждая часть отдается сразу."""
+    buffer = io.BytesIO()
+    with _gzip_file(buffer, level, padding) as file:
+        for chunk in chunks:
+            file.write(chunk)
+            # Z_SYNC_FLUSH: клиент может распаковать все, что уже получил.
+            file.flush()
+            data = buffer.getvalue()
+            if data:
+                yield data
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие HTML и JSON в gzip для клиентов, которые его принимают."""
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0]
+        if content_type.strip() not in settings.COMPRESS_CONTENT_TYPES:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESS_MIN_SIZE
+        ):
+            return response
+
+        # Ответ теперь зависит от Accept-Encoding, даже если он не сжат.
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if not ACCEPTS_GZIP_RE.search(accept_encoding):
+            return response
+
+        level = settings.COMPRESS_LEVEL
+        padding = 0
+        if request.META.get("CSRF_COOKIE_USED"):
+            padding = random_padding()
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, level, padding
+            )
+            # Длина сжатого потока заранее неизвестна.
+            del response["Content-Length"]
+        else:
+            compressed = compress(response.content, level, padding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Сжатое представление не совпадает побайтно с исходным: сильный
+        # ETag становится слабым, а условные запросы по нему работают.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = "gzip"
+        return response
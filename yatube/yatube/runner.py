@@ -0,0 +1,20 @@
+"""Запуск тестов manage.py test с настройками для тестов."""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner, который строит миниатюры в потоке запроса.
+
+    Фоновый поток мог бы писать во временный MEDIA_ROOT теста, когда тот
+    уже удаляется.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(THUMBNAIL_WORKERS=0)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "yatube.middleware.CompressionMiddleware",
+    "yatube.db.routers.PrimaryPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -78,16 +80,40 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
+TEST_RUNNER = "yatube.runner.TestRunner"
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединения живут CONN_MAX_AGE секунд и переиспользуются запросами
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "yatube.db.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "CONN_MAX_AGE": 600,
     }
 }
+# Чтение с реплик: псевдонимы баз-реплик из DATABASES, например
+# "replica": {"ENGINE": ..., "NAME": ...}. Пустой список — все запросы
+# идут в default. После записи пользователь читает из основной базы
+# REPLICA_PIN_SECONDS секунд — дольше, чем отстают реплики
+DATABASE_ROUTERS = ["yatube.db.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = "pin_primary"
+# Настройки каждого соединения SQLite: WAL, synchronous=NORMAL (в WAL
+# не теряет целостности, только последние транзакции при сбое питания),
+# 256 МБ отображения файла в память, 64 МБ кэша страниц и ожидание чужой
+# блокировки до 5 секунд
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "temp_store": "memory",
+}
 
 
 # Password validation
@@ -124,13 +150,37 @@ USE_TZ = True
 
 
 STATIC_URL = "/static/"
-# STATIC_ROOT = os.path.join(BASE_DIR, "static_root")
+STATIC_ROOT = os.path.join(BASE_DIR, "static_root")
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
+# collectstatic собирает статику под именами с хэшем содержимого и кладет
+# рядом gzip-копии; такие адреса кэшируются «навсегда». Несобранная
+# статика отдается под исходными именами и кэшируется недолго
+STATICFILES_STORAGE = "yatube.storage.CompressedManifestStaticFilesStorage"
+STATIC_CACHE_MAX_AGE = 60 * 60
 
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Как отдавать загруженные файлы: None — через приложение (FileResponse),
+# "x-accel-redirect" — через nginx (internal location с префиксом ниже),
+# "x-sendfile" — через Apache mod_xsendfile или lighttpd
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+# Имена загрузок не переиспользуются, файлы можно долго кэшировать
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 30
+# Закрытые каталоги MEDIA_ROOT: исходники картинок (IMAGE_KEEP_ORIGINAL)
+# хранят метаданные, которые при загрузке удаляются, и наружу не отдаются
+MEDIA_PRIVATE_PREFIXES = ("posts/originals/",)
+
+
+# Сжатие ответов приложения: какие типы, с какого размера и с каким
+# уровнем (1 — быстро, 9 — плотно). В ответы с токеном CSRF добавляется
+# до COMPRESS_MAX_PADDING случайных байтов против атаки BREACH
+COMPRESS_CONTENT_TYPES = ("text/html", "application/json")
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+COMPRESS_MAX_PADDING = 100
 
 
 # Login
@@ -148,8 +198,49 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 
 # Для кэша
+# Версии лент хранятся в кэше, поэтому при нескольких процессах нужен
+# общий для них бэкенд (memcached, redis): локальный кэш процесса не
+# узнает об изменениях, сделанных другими процессами.
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
+# Страницы лент сбрасываются по событиям, а не по таймауту
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+# Записи в кэше сбрасываются при правке; таймаут ограничивает устаревание
+# того, что сигналы не отслеживают (например, смены имени автора)
+POST_CACHE_TIMEOUT = 60 * 60
+# Защита от одновременной пересборки: сколько живет блокировка, сколько
+# ждать чужой пересборки и насколько рано обновлять значения заранее
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 2
+CACHE_EARLY_REFRESH_BETA = 1.0
+
+# Миниатюры картинок строятся заранее, в пуле потоков; шаблоны выбирают
+# заготовку по имени. 0 потоков — строить сразу, в потоке запроса.
+# Тесты строят сразу (см. yatube.runner и tests/conftest.py)
+THUMBNAIL_BACKEND = "posts.thumbnails.ThumbnailBackend"
+THUMBNAIL_WORKERS = 2
+POST_THUMBNAILS = {
+    "card": ("960x339", {"crop": "center", "upscale": True}),
+}
+
+# Загруженные картинки уменьшаются до IMAGE_MAX_SIZE, теряют метаданные и
+# перекодируются; исходник сохраняется, только если IMAGE_KEEP_ORIGINAL
+IMAGE_MAX_SIZE = (1920, 1920)
+IMAGE_FORMAT = "WEBP"
+IMAGE_QUALITY = 80
+IMAGE_KEEP_ORIGINAL = False
+# Ширины, до которых картинки уменьшаются по запросу, и кэш вариантов
+IMAGE_RESIZE_WIDTHS = (160, 320, 640, 960, 1280)
+IMAGE_RESIZE_CACHE_DIR = os.path.join(BASE_DIR, "media_cache", "resize")
+
+
+# Лента подписок
+# Записи авторов, у которых подписчиков больше порога, не раскладываются
+# по лентам при публикации, а подмешиваются при чтении ленты.
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+# Сколько последних записей автора попадает в ленту при подписке
+TIMELINE_BACKFILL_SIZE = 500
+TIMELINE_BATCH_SIZE = 1000
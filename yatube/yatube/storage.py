@@ -0,0 +1,79 @@
+"""Хранилище статики: имена с хэшем содержимого и сжатые копии.
+
+collectstatic складывает файлы в STATIC_ROOT под именами с хэшем
+содержимого (bootstrap.min.3f8a1c2e9b7d.css) и кладет рядом gzip-копии
+тех, что хорошо сжимаются (bootstrap.min.3f8a1c2e9b7d.css.gz). Содержимое
+по адресу с хэшем не меняется, поэтому кэшируется клиентами «навсегда»;
+сжатую копию выбирает веб-сервер (nginx: gzip_static on) или
+представление yatube.views.static.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .files import write_atomic
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css", ".js", ".map", ".json", ".svg", ".txt", ".html", ".xml",
+    ".ico", ".ttf", ".otf", ".eot",
+)
+# Файлы меньше порога почти не сжимаются, а лишний запрос к диску и
+# заголовки обходятся дороже
+COMPRESS_MIN_SIZE = 256
+
+
+def compress(data):
+    """gzip с максимальным сжатием; mtime=0 — одинаковый результат сборок."""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэшированные имена из манифеста и gzip-копии рядом с файлами.
+
+    Файлы, которых нет в манифесте (статика не собрана, как в тестах и
+    при разработке), отдаются под исходными именами, а не роняют шаблон.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def is_immutable(self, name):
+        """Имя с хэшем содержимого из манифеста."""
+        return name in self.hashed_files.values()
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if self.compress_file(name):
+                yield name, f"{name}.gz", True
+
+    def compress_file(self, name):
+        """Кладет name.gz рядом с файлом, если сжатие имеет смысл.
+
+        Устаревшая копия от прошлой сборки удаляется: иначе под исходным
+        именем отдавалось бы старое содержимое.
+        """
+        path = self.path(name)
+        compressed = None
+        if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            if os.path.getsize(path) >= COMPRESS_MIN_SIZE:
+                with open(path, "rb") as file:
+                    data = file.read()
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    compressed = None
+        if compressed is None:
+            if os.path.exists(f"{path}.gz"):
+                os.remove(f"{path}.gz")
+            return False
+        write_atomic(f"{path}.gz", compressed)
+        return True
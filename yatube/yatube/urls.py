@@ -15,10 +15,11 @@ Including another URLconf
 """
 from django.conf import settings
 from django.conf.urls import handler404, handler500
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from . import views
+
 handler404 = "yatube.views.page_not_found"  # noqa
 handler500 = "yatube.views.server_error"  # noqa
 
@@ -28,14 +29,14 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("posts.urls")),
     path("about/", include("about.urls", namespace="about")),
+    path(
+        settings.MEDIA_URL.lstrip("/") + "<path:path>",
+        views.media,
+        name="media",
+    ),
+    path(
+        settings.STATIC_URL.lstrip("/") + "<path:path>",
+        views.static,
+        name="static",
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
-    urlpatterns += static(
-        settings.STATIC_URL,
-        document_root=settings.STATIC_ROOT
-    )
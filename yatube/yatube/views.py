@@ -1,6 +1,19 @@
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from http import HTTPStatus
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, require_safe
+
+from .files import ACCEPTS_GZIP_RE, FOREVER, file_response
 
 
 @require_http_methods(["GET", "POST"])
@@ -20,3 +33,90 @@ def server_error(request):
         "misc/500.html",
         status=HTTPStatus.INTERNAL_SERVER_ERROR
     )
+
+
+@require_safe
+def media(request, path):
+    """Загруженные файлы, кроме закрытых MEDIA_PRIVATE_PREFIXES.
+
+    Если перед приложением стоит веб-сервер, файл отдает он: nginx по
+    X-Accel-Redirect, Apache и lighttpd по X-Sendfile. Иначе файл
+    отдается через FileResponse с поддержкой Range и условных запросов.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Файл не найден.")
+    name = os.path.relpath(full_path, os.path.abspath(settings.MEDIA_ROOT))
+    if name.replace(os.sep, "/").startswith(settings.MEDIA_PRIVATE_PREFIXES):
+        raise Http404("Файл не найден.")
+    if not os.path.isfile(full_path):
+        raise Http404("Файл не найден.")
+
+    if settings.MEDIA_SENDFILE == "x-accel-redirect":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+    elif settings.MEDIA_SENDFILE == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = full_path
+    else:
+        return file_response(
+            request, full_path, max_age=settings.MEDIA_CACHE_MAX_AGE
+        )
+
+    # Тип и кэширование задает приложение, а тело и Range — веб-сервер.
+    response["Content-Type"] = (
+        mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    )
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE
+    )
+    return response
+
+
+@require_safe
+def static(request, path):
+    """Статика из STATIC_ROOT.
+
+    Адреса с хэшем содержимого кэшируются «навсегда». Клиентам, которые
+    принимают gzip, отдается заранее сжатая копия файла, если она есть.
+    При разработке несобранная статика ищется в исходных каталогах.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Файл не найден.")
+    if not os.path.isfile(full_path):
+        full_path = settings.DEBUG and finders.find(path)
+        if not full_path:
+            raise Http404("Файл не найден.")
+
+    if staticfiles_storage.is_immutable(path):
+        max_age, immutable = FOREVER, True
+    else:
+        max_age, immutable = settings.STATIC_CACHE_MAX_AGE, False
+    content_type = mimetypes.guess_type(full_path)[0]
+
+    compressed_path = f"{full_path}.gz"
+    if not os.path.isfile(compressed_path):
+        return file_response(
+            request, full_path, max_age=max_age, immutable=immutable,
+            content_type=content_type,
+        )
+    accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if ACCEPTS_GZIP_RE.search(accept_encoding):
+        response = file_response(
+            request, compressed_path, max_age=max_age, immutable=immutable,
+            content_type=content_type,
+        )
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = file_response(
+            request, full_path, max_age=max_age, immutable=immutable,
+            content_type=content_type,
+        )
+    # Ответ зависит от Accept-Encoding: кэши хранят оба варианта.
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response